@@ -403,6 +403,80 @@ def set_settings(mainWindow, configs_layout):
     configs_layout.addWidget(config)
 
 
+def set_slice_selection(mainWindow, configs_layout):
+    config = QTabWidget()
+    # Header query: only the selected slices are calculated (empty fields = no restriction)
+    config_layout = QGridLayout()
+    caption_text = QLabel("Slice selection")
+    myFont = QtGui.QFont()
+    myFont.setPointSize(10)
+    myFont.setBold(True)
+    caption_text.setFont(myFont)
+    config_layout.addWidget(caption_text, 0, 0)
+    #
+    config_layout.addWidget(QLabel("series description:"), 1, 0)
+    query_series_description = QLineEdit()
+    mainWindow.query_series_description = query_series_description
+    config_layout.addWidget(query_series_description, 1, 1)
+    #
+    config_layout.addWidget(QLabel("modality:"), 2, 0)
+    query_modality = QLineEdit()
+    mainWindow.query_modality = query_modality
+    config_layout.addWidget(query_modality, 2, 1)
+    #
+    config_layout.addWidget(QLabel("slice location [mm] min / max:"), 1, 2)
+    query_slice_location_min = QLineEdit()
+    query_slice_location_max = QLineEdit()
+    mainWindow.query_slice_location_min = query_slice_location_min
+    mainWindow.query_slice_location_max = query_slice_location_max
+    config_layout.addWidget(query_slice_location_min, 1, 3)
+    config_layout.addWidget(query_slice_location_max, 1, 4)
+    #
+    config_layout.addWidget(QLabel("trigger time [ms] min / max:"), 2, 2)
+    query_trigger_time_min = QLineEdit()
+    query_trigger_time_max = QLineEdit()
+    mainWindow.query_trigger_time_min = query_trigger_time_min
+    mainWindow.query_trigger_time_max = query_trigger_time_max
+    config_layout.addWidget(query_trigger_time_min, 2, 3)
+    config_layout.addWidget(query_trigger_time_max, 2, 4)
+    #
+    config_layout.addWidget(QLabel("UIDs (comma separated):"), 3, 0)
+    query_uids = QLineEdit()
+    mainWindow.query_uids = query_uids
+    config_layout.addWidget(query_uids, 3, 1, 1, 4)
+    #
+    # SQLite index of the DICOM headers, reruns only read new or changed files (empty = no index)
+    config_layout.addWidget(QLabel("DICOM index file:"), 4, 0)
+    dicom_index_file = QLineEdit()
+    dicom_index_file.setPlaceholderText("e.g. shortCardiac_index.sqlite (in the DICOM folder) or an absolute path")
+    mainWindow.dicom_index_file = dicom_index_file
+    config_layout.addWidget(dicom_index_file, 4, 1, 1, 4)
+    config.setLayout(config_layout)
+    config.setMaximumHeight(160)
+    configs_layout.addWidget(config)
+
+
+def query_text(line_edit):
+    text = line_edit.text().strip()
+    return text if text else None
+
+
+def query_number(text):
+    if text is None:
+        return None
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        raise ValueError(f"Invalid number in the slice selection: '{text}'")
+
+
+def query_range(min_line_edit, max_line_edit):
+    minimum, maximum = query_text(min_line_edit), query_text(max_line_edit)
+    if minimum is None and maximum is None:
+        return None
+    return query_number(minimum), query_number(maximum)
+
+
 def add_information(layout):
     info_layout = QGridLayout()
     version = QLabel("Version: 1.1.0 - ")
@@ -514,6 +588,7 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(QSize(1200, 1000))
         config_loading(self, config_HBoxLayout)
         set_settings(self, config_HBoxLayout)
+        set_slice_selection(self, config_HBoxLayout)
         set_angle_dependent_measurements(self, config_GridLayout, 0, 0, 2, 1)
         set_calculation_features(self, config_GridLayout, 2, 0, 1, 1)
         set_visualisation(self, config_GridLayout, 0, 1, 3, 1)
@@ -567,13 +642,13 @@ class MainWindow(QMainWindow):
                     "Cvi42 file selected, but the current mode is nii! \n \n Mode changed to cvi42"
                 )
             self.coordinate_function_box.setCurrentIndex(0)
-        elif ".pkl" in dialog[0]:
+        elif ".pkl" in dialog[0] or ".npz" in dialog[0]:
             pass
         else:
             msg = QMessageBox()
             msg.setWindowTitle("User massage")
             msg.setText(
-                "Unknown file type selected, please select '.nii', '.nii.gz' or '.cvi42wsx'"
+                "Unknown file type selected, please select '.nii', '.nii.gz', '.cvi42wsx', '.pkl' or '.npz'"
             )
             self.coordinate_line_edit.setText("")
 
@@ -581,7 +656,14 @@ class MainWindow(QMainWindow):
             msg.exec_()
 
     def run_shortCardiac(self):
-        config = self.create_config()
+        try:
+            config = self.create_config()
+        except ValueError as e:
+            msg = QMessageBox()
+            msg.setWindowTitle("User massage")
+            msg.setText(str(e))
+            msg.exec_()
+            return None
         dicom_folder = self.dicom_line_edit.text()
         coord_file = self.coordinate_line_edit.text()
         if "" == dicom_folder or "" == coord_file:
@@ -649,6 +731,9 @@ class MainWindow(QMainWindow):
 
         self.first_img_dicom_transparence.setValue(25)
 
+        for line_edit in self.query_line_edits():
+            line_edit.setText("")
+
         self.first_img_overlay_dicom.setChecked(True)
         self.first_img_overlay_rois.setChecked(False)
         self.first_img_overlay_rois_alpha.setValue(40)
@@ -697,6 +782,8 @@ class MainWindow(QMainWindow):
             "second_img_overlay_rois_alpha": self.second_img_overlay_rois_alpha.value(),
             "second_img_overlay_EI": self.second_img_overlay_EI.isChecked(),
             "second_img_overlay_lines": self.second_img_overlay_lines.isChecked(),
+            "query": [line_edit.text() for line_edit in self.query_line_edits()],
+            "dicom_index_file": self.dicom_index_file.text(),
         }
 
         js = json.dumps(config)
@@ -759,6 +846,23 @@ class MainWindow(QMainWindow):
         )
         self.second_img_overlay_EI.setChecked(config["second_img_overlay_EI"])
         self.second_img_overlay_lines.setChecked(config["second_img_overlay_lines"])
+        # configuration files of older versions do not contain the slice selection
+        for line_edit, text in zip(
+            self.query_line_edits(), config.get("query", [""] * 7)
+        ):
+            line_edit.setText(text)
+        self.dicom_index_file.setText(config.get("dicom_index_file", ""))
+
+    def query_line_edits(self):
+        return [
+            self.query_series_description,
+            self.query_modality,
+            self.query_slice_location_min,
+            self.query_slice_location_max,
+            self.query_trigger_time_min,
+            self.query_trigger_time_max,
+            self.query_uids,
+        ]
 
     def create_config(self):
         cf = RunConfiguration()
@@ -839,6 +943,23 @@ class MainWindow(QMainWindow):
         cf.angle_correction = self.angle_correction.isChecked()
         cf.smooth_resizing = self.smooth_resizing.isChecked()
 
+        ################################################
+        # Slice selection (header query)
+        ################################################
+        cf.query_series_description = query_text(self.query_series_description)
+        cf.query_modality = query_text(self.query_modality)
+        cf.query_slice_location = query_range(
+            self.query_slice_location_min, self.query_slice_location_max
+        )
+        cf.query_trigger_time = query_range(
+            self.query_trigger_time_min, self.query_trigger_time_max
+        )
+        uids = query_text(self.query_uids)
+        cf.query_uids = (
+            None if uids is None else [uid.strip() for uid in uids.split(",") if uid.strip()]
+        )
+        cf.dicom_index_file = query_text(self.dicom_index_file)
+
         return cf
 
 
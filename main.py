@@ -79,14 +79,27 @@ def run(arg: Tuple[Any, Any, Any]) -> Any:
     del sCardiac
     return results
 
-def start_processing(args, output_path, config, dcm_folder, progress_dialog):
+def run_series(arg: Tuple[Any, Any]) -> Any:
+    config, slices = arg
+    # every DICOM file of the series is read once into the 4D cine stack
+    try:
+        stack = CineStack([dcm_file for dcm_file, _ in slices])
+    except ValueError as e:
+        print(f"{e}; the files of the series are processed one by one")
+        return [run((config, dcm_file, coords)) for dcm_file, coords in slices]
+    return [run((config, stack.files[dcm_file], coords)) for dcm_file, coords in slices]
+
+def start_processing(args, n_args, output_path, config, dcm_folder, progress_dialog):
     progress_dialog.update_label("Processing...")
+    run_function = run_series if config.series_scheduling else run
     with open(output_path, "w") as file:
         if config.worker == 0:
-            results = [run(arg) for arg in tqdm(args, file=file)]
+            results = [run_function(arg) for arg in tqdm(args, total=n_args, file=file)]
         else:
             with Pool(config.worker) as pool:
-                results = [_ for _ in tqdm(pool.imap_unordered(run, args), total=len(args), file=file)]
+                results = [_ for _ in tqdm(pool.imap_unordered(run_function, args), total=n_args, file=file)]
+        if config.series_scheduling:
+            results = [result for series_results in results for result in series_results]
         results = natsort.natsorted(results)
         save(results, dcm_folder)
     os.remove(output_path)
@@ -103,37 +116,105 @@ def main(coord_file: str, dcm_folder: Path, config: Any) -> None:
 
     # Hauptlogik in einem separaten Thread
     def main_logic(coord_file):
-        dicoms, UIs = load_DICOMs(dcm_folder)
+        dicoms, UIs = load_DICOMs(
+            dcm_folder,
+            index_file=config.dicom_index_file,
+            worker=config.scan_worker,
+        )
 
         coordReader = CoordReader(config)
-        if not coord_file.endswith(".pkl"):
+        if not coord_file.endswith((".pkl", ".npz")):
             progress_dialog.update_label("Prepare Coordinates...")
-            if config.mode == "cvi42":
-                cvi42_file = coord_file
-                coord_file = coord_file[:-4] + ".pkl"
-                coordReader.preparation_cvi42(
-                    cvi42_file=cvi42_file, save_file_name=coord_file
-                )
-            elif config.mode == "nii":
-                nii_file = coord_file
-                coord_file = (
-                    coord_file[:-4] + ".pkl"
-                    if "nii.gz" not in coord_file
-                    else coord_file[:-7] + ".pkl"
-                )
-                coordReader.preparation_nii(
-                    nii_file=nii_file, dcm_sorted=dicoms, save_file_name=coord_file
-                )
-            else:
-                raise UserWarning
-
+        # prepared coordinates are cached; the workers read their slices from the memory-mapped coordinate store
+        coord_file = coordReader.prepare_coordinates(
+            coord_file, dicoms, UIs, mode=config.mode
+        )
         coords = coordReader.load_coordinates(coord_file)
-        args = parse_to_arguments(config, coords, dicoms, UIs)
+        index_file = (
+            None
+            if config.dicom_index_file is None
+            else get_index_path(dcm_folder, config.dicom_index_file)
+        )
+        # the query is applied after the coordinate preparation, which needs all slices of the nii-file
+        dicoms, UIs = DicomQuery.from_config(config).filter(dicoms, UIs, index_file)
+        uid_index = build_uid_index(dicoms, UIs)
+        if config.series_scheduling:
+            series_uids = series_of_DICOMs(dicoms, index_file=index_file)
+            args = parse_to_series_arguments(
+                config, coords, dicoms, UIs, series_uids, uid_index
+            )
+            n_args = len(args)
+        else:
+            # the arguments are generated while the calculations are running
+            matched_uis = match_coordinates(config, coords, uid_index)
+            args = iter_arguments(config, coords, uid_index, matched_uis)
+            n_args = len(matched_uis)
 
-        progress_dialog.update_progressbar(len(args))
+        progress_dialog.update_progressbar(n_args)
         progress_dialog.check_updates()
 
-        threading.Thread(target=start_processing, args=(args, output_path, config, dcm_folder, progress_dialog)).start()
+        threading.Thread(target=start_processing, args=(args, n_args, output_path, config, dcm_folder, progress_dialog)).start()
 
     threading.Thread(target=main_logic, args=(coord_file,)).start()
     progress_dialog.mainloop()
+
+
+def parse_limit(value: str) -> Any:
+    # limit of a range, "none" leaves the limit open
+    return None if value.lower() == "none" else float(value)
+
+
+def create_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="shortCardiac")
+    parser.add_argument("coord_file", help="cvi42wsx-, nii(.gz)- or prepared pkl/npz-file")
+    parser.add_argument("dcm_folder", help="DICOM folder or zip/tar archive")
+    parser.add_argument("--worker", type=int, default=0, help="number of processes")
+    parser.add_argument("--series-description", help="part of the SeriesDescription")
+    # two values instead of "min:max", argparse takes "-20:0" for an option
+    parser.add_argument(
+        "--slice-location",
+        nargs=2,
+        type=parse_limit,
+        metavar=("MIN", "MAX"),
+        help="in mm, e.g. -20 0 or none 10",
+    )
+    parser.add_argument(
+        "--trigger-time",
+        nargs=2,
+        type=parse_limit,
+        metavar=("MIN", "MAX"),
+        help="in ms, e.g. 0 none",
+    )
+    parser.add_argument("--modality", help="e.g. MR")
+    parser.add_argument("--uids", nargs="+", help="SOPInstanceUIDs or SeriesInstanceUIDs")
+    parser.add_argument(
+        "--index-file",
+        help="SQLite index of the DICOM headers, reruns only read new or changed files; "
+        "a relative path is placed in the DICOM folder, e.g. shortCardiac_index.sqlite",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    parser = create_parser()
+    cli_args = parser.parse_args()
+
+    config = RunConfiguration()
+    config.worker = cli_args.worker
+    config.mode = "nii" if ".nii" in cli_args.coord_file else "cvi42"
+    if config.mode == "nii":
+        config.rv_name_or_nr = "1"
+        config.lv_epi_name_or_nr = "2"
+        config.lv_endo_name_or_nr = "3"
+    config.query_series_description = cli_args.series_description
+    if cli_args.slice_location is not None:
+        config.query_slice_location = tuple(cli_args.slice_location)
+    if cli_args.trigger_time is not None:
+        config.query_trigger_time = tuple(cli_args.trigger_time)
+    config.query_modality = cli_args.modality
+    config.query_uids = cli_args.uids
+    config.dicom_index_file = cli_args.index_file
+
+    main(cli_args.coord_file, cli_args.dcm_folder, config)
@@ -0,0 +1,121 @@
+import numpy as np
+
+from shortCardiacBackend.DicomIndex import DicomIndex
+from shortCardiacBackend.DicomSlice import DicomSlice
+from shortCardiacBackend.supportFunction import read_dicom_header
+
+
+def _position_value(value):
+    return 0.0 if value is None or value == "" else float(value)
+
+
+class CineStack:
+    """
+    All DICOM files of one series arranged as contiguous 4D array with the dimensions (slices, phases, rows, cols).
+    Slices are ordered by SliceLocation; the phase of a file is the rank of its TriggerTime among the trigger times
+    of its slice, so small differences of the trigger times between the slices do not add phases. Every file is read
+    only once; the DicomSlices returned by the stack (by SOPInstanceUID or via the files dict by path) share the pixel
+    data of the 4D array.
+    """
+
+    def __init__(self, dcm_files: list):
+        self.dicoms, self.files = {}, {}
+        positions = {}
+        for dcm_file in dcm_files:
+            dicom = DicomSlice(dcm_file)
+            self.files[dcm_file] = dicom
+            position = (
+                _position_value(dicom.dataset.get("SliceLocation")),
+                _position_value(dicom.dataset.get("TriggerTime")),
+            )
+            self.dicoms[dicom.uid] = dicom
+            positions.setdefault(position, []).append(dicom)
+
+        self.slice_locations = sorted({position[0] for position in positions})
+        # trigger times of every slice (slices, phases)
+        self.trigger_times = [
+            sorted(t for location, t in positions if location == slice_location)
+            for slice_location in self.slice_locations
+        ]
+        phases = {len(trigger_times) for trigger_times in self.trigger_times}
+        if len(phases) > 1:
+            raise ValueError(
+                f"The slices of the series have different numbers of phases: {sorted(phases)}"
+            )
+        self.phases = phases.pop() if phases else 0
+        self.image_shape = (
+            next(iter(self.dicoms.values())).shape if self.dicoms else (0, 0)
+        )
+
+        # UID -> (slice, phase); files with an already occupied position or a different image size keep reading
+        # their own pixel data
+        self.lookup = {}
+        for (slice_location, trigger_time), dicoms in positions.items():
+            dicom = dicoms[0]
+            if dicom.shape != self.image_shape:
+                continue
+            slice_ = self.slice_locations.index(slice_location)
+            self.lookup[dicom.uid] = (
+                slice_,
+                self.trigger_times[slice_].index(trigger_time),
+            )
+            dicom.pixel_loader = self._view_loader(*self.lookup[dicom.uid])
+        self._pixel_array = None
+
+    def _view_loader(self, slice_, phase):
+        return lambda: self.pixel_array[slice_, phase]
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self.slice_locations), self.phases) + self.image_shape
+
+    @property
+    def pixel_array(self) -> np.ndarray:
+        """
+        4D array (slices, phases, rows, cols); the pixel data is read once on first access, missing positions are zero
+        """
+        if self._pixel_array is None:
+            self._pixel_array = self._read_pixel_array()
+        return self._pixel_array
+
+    def _read_pixel_array(self) -> np.ndarray:
+        pixel_array = None
+        for uid, (slice_, phase) in self.lookup.items():
+            pixels = self.dicoms[uid].read_pixel_data()
+            if pixel_array is None:
+                pixel_array = np.zeros(self.shape, dtype=pixels.dtype)
+            pixel_array[slice_, phase] = pixels
+        return np.zeros(self.shape) if pixel_array is None else pixel_array
+
+    def __len__(self):
+        return len(self.dicoms)
+
+    def __contains__(self, uid):
+        return uid in self.dicoms
+
+    def __getitem__(self, uid) -> DicomSlice:
+        return self.dicoms[uid]
+
+
+def series_of_DICOMs(dcm_files: list, index_file: str = None) -> list:
+    """
+    Returns the SeriesInstanceUID of each DICOM file
+
+            Parameters:
+                    dcm_files (list): paths to the DICOM files
+                    index_file (str): path to the DICOM index written by load_DICOMs; if None, the headers are read
+
+            Returns:
+                    series_uids (list): SeriesInstanceUID for each file in dcm_files
+    """
+    if index_file is not None:
+        with DicomIndex(index_file) as index:
+            rows = [index.get(dcm_file) for dcm_file in dcm_files]
+        if all(row is not None for row in rows):
+            return [row["series_instance_uid"] for row in rows]
+    return [
+        read_dicom_header(dcm_file, specific_tags=["SeriesInstanceUID"]).get(
+            "SeriesInstanceUID"
+        )
+        for dcm_file in dcm_files
+    ]
@@ -25,6 +25,27 @@ class RunConfiguration(object):
         # Used number of processes
         self.worker = 0
 
+        # All slices of a series are calculated by the same process, which reads the series once as 4D cine stack
+        self.series_scheduling = False
+
+        # Number of threads used to walk the DICOM folder and read the DICOM headers (0 = sequential);
+        # helpful for network-mounted archives
+        self.scan_worker = 0
+
+        # SQLite index of the DICOM headers, relative paths are placed in the DICOM folder (None = no index).
+        # Reruns over an unchanged DICOM folder only read new or changed files. Off by default, the DICOM folder
+        # may be read-only or shared; e.g. "shortCardiac_index.sqlite" or an absolute path in a writable folder
+        # (main.py --index-file, "DICOM index file" in the GUI)
+        self.dicom_index_file = None
+
+        # Header query restricting the analysed slices before any calculation starts (None = no restriction),
+        # e.g. mid-ventricular slices at end-diastole: query_slice_location = (-20, 0), query_trigger_time = (0, 10)
+        self.query_series_description = None  # part of the SeriesDescription (case-insensitive)
+        self.query_slice_location = None  # (min, max) in mm, one limit can be None
+        self.query_trigger_time = None  # (min, max) in ms, one limit can be None
+        self.query_modality = None  # e.g. "MR"
+        self.query_uids = None  # list of SOPInstanceUIDs or SeriesInstanceUIDs
+
         ###############################################
         # Image Mode Selection
         ##############################################
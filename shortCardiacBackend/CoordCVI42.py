@@ -1,15 +1,39 @@
 import pickle
+import xml.etree.ElementTree as ET
+
 import numpy as np
-from xml.dom import minidom
 
 
-def keepElementNodes(nodes):
-    """Get the element nodes"""
-    nodes2 = []
-    for node in nodes:
-        if node.nodeType == node.ELEMENT_NODE:
-            nodes2 += [node]
-    return nodes2
+def localName(name):
+    """Get the name without namespace ('{uri}key' or 'Hash:key' -> 'key')"""
+    return name.rsplit("}", 1)[-1].rsplit(":", 1)[-1]
+
+
+def hashKey(node):
+    """Get the value of the Hash:key attribute ('' if the node has none)"""
+    for name, value in node.attrib.items():
+        if localName(name) == "key":
+            return value
+    return ""
+
+
+def findTexts(node, name):
+    """Get the texts of all descendants with the local name (in document order)"""
+    for child in node.iter():
+        if child is not node and localName(child.tag) == name:
+            # all descendants share the namespace of the first one, the search by tag runs in C
+            return [descendant.text for descendant in node.iter(child.tag)]
+    return []
+
+
+def parsePoints(node):
+    """
+    Parse a Points object. All x and y coordinates of the contour are gathered at once and converted with a single
+    numpy call.
+    """
+    x = np.array(findTexts(node, "x"), dtype=float)  # + 100
+    y = np.array(findTexts(node, "y"), dtype=float)  # + 100
+    return np.stack([x, y], axis=1)
 
 
 def parseContours(node):
@@ -18,55 +42,94 @@ def parseContours(node):
     We first parse the contour name, then parse the points and pixel size.
     """
     contours = {}
-    for child in keepElementNodes(node.childNodes):
-        contour_name = child.getAttribute("Hash:key")
-        sup = 1
-        for child2 in keepElementNodes(child.childNodes):
-            if child2.getAttribute("Hash:key") == "Points":
-                points = []
-                for child3 in keepElementNodes(child2.childNodes):
-                    x = float(
-                        child3.getElementsByTagName("Point:x")[0].firstChild.data
-                    )  # + 100
-                    y = float(
-                        child3.getElementsByTagName("Point:y")[0].firstChild.data
-                    )  # + 100
-                    points += [[x, y]]
-            if child2.getAttribute("Hash:key") == "SubpixelResolution":
-                sub = int(child2.firstChild.data)
-        points = np.array(points)
+    for child in node:
+        contour_name = hashKey(child)
+        points, sub = [], 1
+        for child2 in child:
+            if hashKey(child2) == "Points":
+                points = parsePoints(child2)
+            if hashKey(child2) == "SubpixelResolution":
+                sub = int(child2.text)
+        points = np.array(points, dtype=float)
         points /= sub
         contours[contour_name] = points
     return contours
 
 
-def traverseNode(node, uid_contours):
-    """Traverse the nodes"""
-    child = node.firstChild
-    while child:
-        if child.nodeType == child.ELEMENT_NODE:
-            # This is where the information for each dicom file starts
-            if child.getAttribute("Hash:key") == "ImageStates":
-                for child2 in keepElementNodes(child.childNodes):
-                    # UID for the dicom file
-                    uid = child2.getAttribute("Hash:key")
-                    for child3 in keepElementNodes(child2.childNodes):
-                        if child3.getAttribute("Hash:key") == "Contours":
-                            contours = parseContours(child3)
-                            if contours:
-                                uid_contours[uid] = contours
-        traverseNode(child, uid_contours)
-        child = child.nextSibling
-
-
-def parseFile(xml_name, coord_file):
-    """Parse a cvi42 xml file"""
-    dom = minidom.parse(xml_name)
-    uid_contours = {}
-    traverseNode(dom, uid_contours)
-
-    data = {}
-    for uid, contours in uid_contours.items():
-        data[uid] = contours
+def iterContours(xml_name, uids=None, skipped_uids=None):
+    """
+    Streams the contours of a cvi42 workspace without loading the whole file.
+    Only the subtree of the Contours object which is currently parsed is kept in memory; all other nodes are
+    discarded as soon as they are read.
+
+            Parameters:
+                    xml_name (str): cvi42 workspace (*.cvi42wsx)
+                    uids (set): SOPInstanceUIDs of the needed dicom files; the contours of all other ImageStates are
+                    not parsed. If None, all ImageStates are parsed.
+                    skipped_uids (set): if given, the UIDs of all skipped ImageStates are added
+
+            Yields:
+                    (uid (str), contour_name (str), points (np.ndarray)) for every contour in document order
+    """
+    uids = None if uids is None else set(uids)
+    path = []  # (node, Hash:key) of all open nodes; the keys within skipped ImageStates are None
+    open_contours = 0
+    skipped_depth = None  # depth of the ImageState which is currently skipped
+    for event, node in ET.iterparse(xml_name, events=("start", "end")):
+        if event == "start":
+            key = None if skipped_depth is not None else hashKey(node)
+            if uids is not None and path and path[-1][1] == "ImageStates":
+                if key not in uids:
+                    skipped_depth = len(path)
+                    if skipped_uids is not None:
+                        skipped_uids.add(key)
+            path.append((node, key))
+            open_contours += key == "Contours"
+            continue
+        _, key = path.pop()
+        if len(path) == skipped_depth:
+            skipped_depth = None
+        if key == "Contours":
+            open_contours -= 1
+            # This is where the information for each dicom file starts: ImageStates -> UID -> Contours
+            if len(path) >= 2 and path[-2][1] == "ImageStates":
+                uid = path[-1][1]
+                for contour_name, points in parseContours(node).items():
+                    yield uid, contour_name, points
+        if open_contours == 0:
+            node.clear()
+            if path:
+                path[-1][0].remove(node)
+
+
+def parseWorkspace(xml_name, uids=None) -> dict:
+    """
+    Parse the contours of a cvi42 xml file
+
+            Parameters:
+                    xml_name (str): cvi42 workspace (*.cvi42wsx)
+                    uids (list): SOPInstanceUIDs of the dicom files to analyse; all other ImageStates are skipped
+
+            Returns:
+                    coords (dict): dicom ui -> contour name -> points (N, 2)
+    """
+    data, skipped_uids = {}, set()
+    for uid, contour_name, points in iterContours(xml_name, uids, skipped_uids):
+        data.setdefault(uid, {})[contour_name] = points
+    if uids is not None:
+        print(f"cvi42: {len(skipped_uids)} ImageStates skipped (no matching DICOM file)")
+    return data
+
+
+def parseFile(xml_name, coord_file, uids=None):
+    """
+    Parse a cvi42 xml file
+
+            Parameters:
+                    xml_name (str): cvi42 workspace (*.cvi42wsx)
+                    coord_file (str): pickle file for the coordinates
+                    uids (list): SOPInstanceUIDs of the dicom files to analyse; all other ImageStates are skipped
+    """
+    data = parseWorkspace(xml_name, uids)
     with open(coord_file, "wb") as f:
         pickle.dump(data, f)
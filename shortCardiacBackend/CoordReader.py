@@ -1,22 +1,115 @@
+import glob
+import hashlib
+import json
+import os
+import re
+from functools import partial
+from multiprocessing import Pool
+
 import cv2
 import nibabel as nib
 import numpy as np
 import pydicom
+from scipy.ndimage import find_objects
 from scipy.ndimage.morphology import binary_fill_holes
 
 from shortCardiacBackend.CoordCVI42 import *
+from shortCardiacBackend.CoordStore import (
+    CoordStore,
+    convert_pkl_to_store,
+    file_hash,
+    save_coord_store,
+)
 from shortCardiacBackend.transformContours import mask_to_polygon
 
+# Part of the cache key of prepared coordinates; increase if the preparation of the same input changes
+PREPARATION_VERSION = 1
+
+
+def remove_stale_stores(base: str, store_file: str):
+    """
+    Removes the cached coordinate stores of an older input or configuration ('<base>.<key>.npz') except store_file
+    """
+    for file in glob.glob(glob.escape(base) + ".*.npz"):
+        if file != store_file and re.fullmatch(r"[0-9a-f]{16}\.npz", file[len(base) + 1 :]):
+            try:
+                os.remove(file)
+            except OSError:
+                # e.g. still opened by another run
+                pass
+
 
 class CoordReader:
     def __init__(self, config):
         self.config = config
 
+    def preparation_key(self, coord_file, mode, uis) -> str:
+        """
+        Cache key of prepared coordinates: content of the coordinate file, label ids, order of the dicom files and
+        version of the preparation
+        """
+        ids = [
+            self.config.rv_name_or_nr,
+            self.config.lv_epi_name_or_nr,
+            self.config.lv_endo_name_or_nr,
+        ]
+        key = json.dumps(
+            [file_hash(coord_file), mode, ids, [str(ui) for ui in uis], PREPARATION_VERSION]
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def prepare_coordinates(self, coord_file, dcm_sorted, uis, mode="cvi42") -> str:
+        """
+        Prepares the coordinates of a cvi42 or nii file as coordinate store. The store is cached next to the
+        coordinate file under a content-hashed name, so reruns with the same input skip the preparation, while changed
+        inputs (file, label ids, dicom files) are prepared again. The store is the only cache file, stores of
+        older preparations of the same coordinate file are removed.
+
+                Parameters:
+                        coord_file (str): cvi42wsx-, nii(.gz)-file or already prepared coordinates ('.pkl', '.npz');
+                        pickle files are converted into a store in the temp directory (see convert_pkl_to_store)
+                        dcm_sorted (list): dicom files (as returned by load_DICOMs)
+                        uis (list): dicom uis of dcm_sorted
+                        mode (str): 'cvi42' or 'nii'
+
+                Returns:
+                        store_file (str): coordinate store ('.npz'), see load_coordinates
+        """
+        if coord_file.endswith(".npz"):
+            return coord_file
+        if coord_file.endswith(".pkl"):
+            return convert_pkl_to_store(coord_file)
+        if mode not in ("cvi42", "nii"):
+            raise UserWarning
+        base = (
+            coord_file[:-7]
+            if coord_file.endswith(".nii.gz")
+            else os.path.splitext(coord_file)[0]
+        )
+        store_file = f"{base}.{self.preparation_key(coord_file, mode, uis)[:16]}.npz"
+        if os.path.exists(store_file):
+            print(f"Prepared coordinates loaded from cache: {store_file}")
+            return store_file
+
+        if mode == "cvi42":
+            coords = parseWorkspace(coord_file, uis)
+        else:
+            coords = self.coordinates_of_nii(coord_file, dcm_sorted, uis)
+        # the store is renamed when complete, an interrupted preparation never leaves a cache entry; the temporary
+        # name is unique per process, so concurrent preparations do not write the same file
+        temp_file = save_coord_store(coords, f"{store_file[:-4]}.{os.getpid()}.tmp.npz")
+        os.replace(temp_file, store_file)
+        remove_stale_stores(base, store_file)
+        return store_file
+
     def load_coordinates(self, file):
         """
         Import of the coordinates segmented in Circle. If the file is a pickle file ('*.pkl'), the coordinates are imported directly.
+        A coordinate store ('*.npz', see CoordStore) is opened read-only and memory-mapped instead of being loaded.
         Alternatively, the data is first prepared and then imported.
         """
+        if file.endswith(".npz"):
+            return CoordStore(file)
         if ".pkl" not in file:
             print(
                 "Invalid file format! Please use a preparation function to translate the coordinates to the correct format."
@@ -25,79 +118,166 @@ class CoordReader:
         with open(file, "rb") as f:
             return pickle.load(f)
 
-    def preparation_cvi42(self, cvi42_file, save_file_name=None):
+    def preparation_cvi42(self, cvi42_file, save_file_name=None, uis=None):
         """
         Reading out the coordinates and assigning them to the dicom files
 
                 Parameters:
                         cvi42_file (str): circle-xml file with coordinates
-                        uis (list): list with included dicom uis
-                        coord_attributes = ....
-
-                Returns:
-                        coordinates (dict: dict with dicom ui as key
+                        save_file_name (str): pickle file for the prepared coordinates
+                        uis (list): list with included dicom uis (e.g. from load_DICOMs); the contours of all other
+                        images are skipped. If None, all contours are prepared.
         """
         save_file_name = (
             save_file_name if save_file_name is not None else cvi42_file + ".pkl"
         )
-        parseFile(cvi42_file, save_file_name)
+        parseFile(cvi42_file, save_file_name, uis)
+
+    def preparation_nii(self, nii_file, dcm_sorted, save_file_name=None, uis=None):
+        """
+        Extraction of the contours of a NIfTI label volume and assigning them to the dicom files
+
+                Parameters:
+                        nii_file (str): NIfTI file with one slice per dicom file
+                        dcm_sorted (list): dicom files in the order of the NIfTI slices
+                        save_file_name (str): pickle file for the prepared coordinates
+                        uis (list): dicom uis of dcm_sorted as returned by load_DICOMs; if None, they are read from
+                        the dicom files
+        """
+        coords = self.coordinates_of_nii(nii_file, dcm_sorted, uis)
+        with open(save_file_name, "wb") as f:
+            pickle.dump(coords, f)
 
-    def preparation_nii(self, nii_file, dcm_sorted, save_file_name=None):
+    def coordinates_of_nii(self, nii_file, dcm_sorted, uis=None) -> dict:
+        """
+        Contours of a NIfTI label volume per dicom ui (see preparation_nii)
+        """
+        if uis is None:
+            uis = [
+                pydicom.dcmread(dcm_file, stop_before_pixels=True).SOPInstanceUID
+                for dcm_file in dcm_sorted
+            ]
         ids = [
             self.config.rv_name_or_nr,
             self.config.lv_epi_name_or_nr,
             self.config.lv_endo_name_or_nr,
         ]
         mask = self.__load_nifti(nii_file)
-        coords = self.__get_polygon_of_mask(mask, dcm_sorted, ids)
+        return self.__get_polygon_of_mask(mask, uis, ids)
 
-        with open(save_file_name, "wb") as f:
-            pickle.dump(coords, f)
+    def __load_nifti(self, nii_file: str):
+        return NiftiSlices(nii_file)
 
-    def __load_nifti(self, nii_file: str) -> np.ndarray:
-        nimg = nib.load(nii_file)
-        return nimg.get_fdata()[:, :, ::-1].transpose(1, 0, 2)
-
-    def __get_polygon_of_mask(self, mask, dcm_sorted, ids, up_scaling=4):
-        coords = {}
-
-        for i, dcm_file in enumerate(dcm_sorted):
-            ui = pydicom.dcmread(dcm_file).SOPInstanceUID
-            coords[ui] = {}
-            slice_mask = mask[:, :, i].copy().astype("int16")
-            r, g, b = slice_mask.copy(), slice_mask.copy(), slice_mask.copy()
-
-            r[r != int(ids[0])] = 0
-            r[r == int(ids[0])] = 255
-            g[g != int(ids[1])] = 0
-            g[g == int(ids[1])] = 255
-            b[b != int(ids[2])] = 0
-            b[b == int(ids[2])] = 255
-            temp_rgb = cv2.merge([r, g, b])
-            temp_rgb = cv2.blur(temp_rgb, (2, 2))
-            temp_rgb = cv2.resize(
-                temp_rgb,
-                dsize=(temp_rgb.shape[0] * up_scaling, temp_rgb.shape[0] * up_scaling),
-                interpolation=cv2.INTER_AREA,
-            )
-            temp_rgb = cv2.blur(temp_rgb, (5, 5))
-            slice_mask = np.zeros((temp_rgb.shape[0], temp_rgb.shape[1]))
-            r, g, b = cv2.split(temp_rgb)
-            for x in range(slice_mask.shape[0]):
-                for y in range(slice_mask.shape[1]):
-                    if all([r[x, y] < 100, g[x, y] < 100, b[x, y] < 100]):
-                        continue
-                    slice_mask[x, y] = (
-                        np.argmax(np.array([r[x, y], g[x, y], b[x, y]])) + 1
-                    )
-            for ii, id in enumerate(ids):
-                id = int(id)
-
-                temp = slice_mask.copy()
-                temp[temp != id] = 0
-                temp[temp == id] = 1
-                temp = binary_fill_holes(temp).astype(int)
-
-                coords[ui][str(id)] = mask_to_polygon(temp) / up_scaling
-
-        return coords
+    def __get_polygon_of_mask(self, mask, uis, ids, up_scaling=4):
+        # the slices are read in the order in which they are stored in the file (reversed order of the dicom
+        # files), so that compressed files are decompressed only once
+        indices = range(len(uis) - 1, -1, -1)
+        extract = partial(
+            polygons_of_nifti_slice, mask=mask, ids=ids, up_scaling=up_scaling
+        )
+        if self.config.worker == 0:
+            polygons = list(map(extract, indices))
+        else:
+            # the slices are independent; every process reads its slices itself, imap keeps the order
+            with Pool(self.config.worker) as pool:
+                polygons = list(pool.imap(extract, indices))
+        return dict(zip(uis, polygons[::-1]))
+
+
+class NiftiSlices:
+    """
+    Lazy, slice-wise access to a NIfTI label volume. Every slice is read on access in the native dtype of the file
+    (no float64 volume in memory) and oriented like the dicom images. Only the file name is pickled, so that the
+    processes of a Pool read the slices themselves.
+    """
+
+    def __init__(self, nii_file: str):
+        self.nii_file = nii_file
+        self._image = None
+
+    @property
+    def image(self):
+        if self._image is None:
+            # the file stays open: with a compressed file, slices read in file order are decompressed only once
+            # instead of reopening and decompressing the file from the start for every slice
+            self._image = nib.load(self.nii_file, keep_file_open=True)
+        return self._image
+
+    def __len__(self):
+        return self.image.shape[2]
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        if not 0 <= i < len(self):
+            raise IndexError(f"slice {i} out of range, the volume has {len(self)} slices")
+        # same orientation as get_fdata()[:, :, ::-1].transpose(1, 0, 2) of the volume
+        return np.asanyarray(self.image.dataobj[:, :, len(self) - 1 - i]).T
+
+    def __getstate__(self):
+        return {"nii_file": self.nii_file, "_image": None}
+
+
+def polygons_of_nifti_slice(i: int, mask: NiftiSlices, ids, up_scaling=4) -> dict:
+    return polygons_of_slice(mask[i], ids, up_scaling)
+
+
+def split_labels(slice_mask, ids) -> np.ndarray:
+    """
+    Splits a label image into one channel per label (255 inside, 0 outside) in a single pass using a lookup table
+
+            Parameters:
+                    slice_mask (np.ndarray): label image
+                    ids (list): labels of the channels
+
+            Returns:
+                    channels (np.ndarray): int16 array of shape (rows, cols, len(ids))
+    """
+    ids = [int(id) for id in ids]
+    labels = np.asarray(slice_mask)
+    if not np.issubdtype(labels.dtype, np.integer):
+        # non-integral values (e.g. of scaled float label maps) belong to no label
+        labels = np.where(np.mod(labels, 1) == 0, labels, -1)
+    # the last row of the lookup table belongs to all values which are no label
+    lut = np.zeros((max(ids) + 2, len(ids)), dtype="int16")
+    for channel, id in enumerate(ids):
+        lut[id, channel] = 255
+    return lut[np.clip(labels, -1, max(ids) + 1).astype(np.intp)]
+
+
+def polygons_of_slice(slice_mask, ids, up_scaling=4) -> dict:
+    """
+    Extracts the contour of every label of one NIfTI slice; labels which are missing in the slice are skipped
+
+            Parameters:
+                    slice_mask (np.ndarray): label image of the slice
+                    ids (list): labels of right ventricle, left ventricular epicard and endocard
+                    up_scaling (int): the contours are extracted on the upscaled and smoothed label image
+
+            Returns:
+                    polygons (dict): label (str) -> contour (np.ndarray)
+    """
+    polygons = {}
+    temp_rgb = split_labels(slice_mask, ids)
+    temp_rgb = cv2.blur(temp_rgb, (2, 2))
+    temp_rgb = cv2.resize(
+        temp_rgb,
+        dsize=(temp_rgb.shape[0] * up_scaling, temp_rgb.shape[0] * up_scaling),
+        interpolation=cv2.INTER_AREA,
+    )
+    temp_rgb = cv2.blur(temp_rgb, (5, 5))
+    # label of the strongest channel (first on ties) for all pixels where at least one channel is >= 100
+    slice_mask = np.where(
+        temp_rgb.max(axis=2) >= 100, np.argmax(temp_rgb, axis=2) + 1, 0
+    )
+    # bounding boxes of all labels in one pass; holes are filled and contours are traced only inside the boxes
+    boxes = find_objects(slice_mask)
+    for id in ids:
+        id = int(id)
+        box = boxes[id - 1] if 0 < id <= len(boxes) else None
+        if box is None:
+            continue
+
+        temp = binary_fill_holes(slice_mask[box] == id).astype(int)
+
+        offset = (box[1].start, box[0].start)
+        polygons[str(id)] = mask_to_polygon(temp, offset=offset) / up_scaling
+    return polygons
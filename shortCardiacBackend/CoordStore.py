@@ -0,0 +1,163 @@
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+import zipfile
+from collections.abc import Mapping
+
+import numpy as np
+
+
+def file_hash(file: str, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of the content of a file
+    """
+    sha256 = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def save_coord_store(coords: dict, store_file: str) -> str:
+    """
+    Saves coordinates as columnar coordinate store (uncompressed npz-file):
+    one flat points array (P, 2) and the tables uids, uid_offsets, contour_names, contour_offsets and contour_ndims;
+    the contours of uids[i] are contour_names[uid_offsets[i]:uid_offsets[i + 1]] and the points of contour k are
+    points[contour_offsets[k]:contour_offsets[k + 1]]; contour_ndims keeps the shape of empty contours (e.g. (0,))
+
+            Parameters:
+                    coords (dict): dicom ui -> contour name -> points (N, 2), e.g. from CoordReader.load_coordinates
+                    store_file (str): path to the store ('.npz')
+
+            Returns:
+                    store_file (str): path to the store
+    """
+    uid_offsets, contour_names, contour_offsets, points = [0], [], [0], []
+    contour_ndims = []
+    for contours in coords.values():
+        for contour_name, contour in contours.items():
+            contour = np.asarray(contour, dtype=float)
+            contour_ndims.append(contour.ndim)
+            contour = contour.reshape(-1, 2)
+            contour_names.append(contour_name)
+            contour_offsets.append(contour_offsets[-1] + len(contour))
+            points.append(contour)
+        uid_offsets.append(len(contour_names))
+    np.savez(
+        store_file,
+        uids=np.array(list(coords.keys()), dtype=str),
+        uid_offsets=np.array(uid_offsets, dtype=np.int64),
+        contour_names=np.array(contour_names, dtype=str),
+        contour_offsets=np.array(contour_offsets, dtype=np.int64),
+        contour_ndims=np.array(contour_ndims, dtype=np.int64),
+        points=np.concatenate(points) if points else np.zeros((0, 2)),
+    )
+    return store_file
+
+
+def convert_pkl_to_store(pkl_file: str, store_file: str = None) -> str:
+    """
+    Converts prepared coordinates ('.pkl') into a coordinate store. By default, the store is cached in the temp
+    directory under the content hash of the pickle file, the folder of the pickle file is never written.
+    """
+    if store_file is None:
+        store_file = os.path.join(
+            tempfile.gettempdir(), f"shortCardiac_{file_hash(pkl_file)[:16]}.npz"
+        )
+        if os.path.exists(store_file):
+            return store_file
+    with open(pkl_file, "rb") as f:
+        coords = pickle.load(f)
+    # renamed when complete, the temporary name is unique per process
+    temp_file = save_coord_store(coords, f"{store_file[:-4]}.{os.getpid()}.tmp.npz")
+    os.replace(temp_file, store_file)
+    return store_file
+
+
+def memmap_npz_member(npz_file: str, name: str):
+    """
+    Maps an uncompressed array of a npz-file read-only into memory
+
+            Returns:
+                    array (np.memmap): view on the array in the file or None if the array is compressed or empty
+    """
+    with zipfile.ZipFile(npz_file) as archive:
+        info = archive.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(npz_file, "rb") as f:
+        # local file header: 30 bytes, file name and extra field; followed by the npy-file
+        f.seek(info.header_offset)
+        name_length, extra_length = struct.unpack("<HH", f.read(30)[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if int(np.prod(shape)) == 0:
+        return None
+    return np.memmap(
+        npz_file,
+        dtype=dtype,
+        mode="r",
+        offset=offset,
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
+
+
+class CoordStore(Mapping):
+    """
+    Read-only access to a coordinate store (see save_coord_store), usable like the dict of
+    CoordReader.load_coordinates: store[ui] returns the contours of one dicom file in O(1).
+    The points are memory-mapped, so only the points of the requested slices are read. Only the path is pickled,
+    processes reopen the store themselves.
+    """
+
+    def __init__(self, store_file: str):
+        self.store_file = store_file
+        with np.load(store_file, allow_pickle=False) as store:
+            self.uids = store["uids"].tolist()
+            self.uid_offsets = store["uid_offsets"]
+            self.contour_names = store["contour_names"].tolist()
+            self.contour_offsets = store["contour_offsets"]
+            # stores without contour_ndims only contain (N, 2) contours
+            self.contour_ndims = (
+                store["contour_ndims"]
+                if "contour_ndims" in store.files
+                else np.full(len(self.contour_names), 2)
+            )
+            points = memmap_npz_member(store_file, "points")
+            self.points = store["points"] if points is None else points
+        self.rows = {ui: i for i, ui in enumerate(self.uids)}
+
+    def __getstate__(self):
+        return {"store_file": self.store_file}
+
+    def __setstate__(self, state):
+        self.__init__(state["store_file"])
+
+    def __getitem__(self, ui) -> dict:
+        i = self.rows[ui]
+        contours = {}
+        for k in range(self.uid_offsets[i], self.uid_offsets[i + 1]):
+            start, end = self.contour_offsets[k], self.contour_offsets[k + 1]
+            # copy, the calculations change the contours in place
+            contour = np.array(self.points[start:end])
+            contours[self.contour_names[k]] = (
+                contour.reshape(-1) if self.contour_ndims[k] == 1 else contour
+            )
+        return contours
+
+    def __iter__(self):
+        return iter(self.uids)
+
+    def __len__(self):
+        return len(self.uids)
+
+    def __contains__(self, ui):
+        return ui in self.rows
@@ -0,0 +1,224 @@
+import io
+import os
+import re
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+
+# Archive members are addressed like files in a folder: "<path to archive>/<member name>",
+# e.g. "export/study.zip/DICOM/IM_0001"
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# compressed tar archives have no random access, they are read as a stream (see TarStream)
+COMPRESSED_TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+_ARCHIVE_IN_PATH = re.compile(
+    r"\.(zip|tar|tar\.gz|tgz|tar\.bz2|tar\.xz)(?=[/\\])", re.IGNORECASE
+)
+_tar_lock = threading.Lock()
+
+
+def is_archive(path: str) -> bool:
+    """
+    check if a path is a zip or tar archive (by suffix)
+    """
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def split_archive_path(path: str):
+    """
+    Splits the path of an archive member into the path to the archive and the member name
+
+    :param path: path to a file or archive member
+    :return: (archive (str), member (str)) or None if the path is not inside an archive
+    """
+    if os.path.exists(path):
+        return None
+    for match in _ARCHIVE_IN_PATH.finditer(path):
+        archive = path[: match.end()]
+        if os.path.isfile(archive):
+            return archive, path[match.end() + 1 :].replace("\\", "/")
+    return None
+
+
+@lru_cache(maxsize=8)
+def _open_archive(archive: str, pid: int):
+    # the process id is part of the cache key, so forked workers never share the file handle of their parent
+    if zipfile.is_zipfile(archive):
+        return zipfile.ZipFile(archive)
+    return tarfile.open(archive)
+
+
+def open_archive(archive: str):
+    return _open_archive(archive, os.getpid())
+
+
+def is_compressed_tar(archive: str) -> bool:
+    return archive.lower().endswith(COMPRESSED_TAR_SUFFIXES)
+
+
+@lru_cache(maxsize=8)
+def tar_headers(archive: str) -> dict:
+    """
+    Reads the member headers of a compressed tar archive in one streaming pass (nothing is written to disk)
+
+    :param archive: path to the tar archive
+    :return: member name -> size (in archive order)
+    """
+    with tarfile.open(archive, mode="r|*") as handle:
+        return {member.name: member.size for member in handle if member.isfile()}
+
+
+class TarStream:
+    """
+    Sequential reader of a compressed tar archive. The archive is decompressed while reading forward, members requested
+    in archive order cost one pass over the archive in total; only a member before the current position restarts the
+    stream. The last passed members are kept in memory, so slightly out-of-order requests (threads) are answered
+    without a restart.
+    """
+
+    def __init__(self, archive: str, keep: int = 64):
+        self.archive = archive
+        self.keep = keep
+        self.order = {name: i for i, name in enumerate(tar_headers(archive))}
+        self.recent = OrderedDict()
+        self.handle = None
+        self.position = 0
+
+    def restart(self):
+        if self.handle is not None:
+            self.handle.close()
+        self.handle = tarfile.open(self.archive, mode="r|*")
+        self.position = 0
+
+    def read(self, member: str) -> bytes:
+        if member in self.recent:
+            self.recent.move_to_end(member)
+            return self.recent[member]
+        if self.handle is None or self.order[member] < self.position:
+            self.restart()
+        while True:
+            info = self.handle.next()
+            if info is None:
+                raise KeyError(member)
+            if not info.isfile():
+                continue
+            data = self.handle.extractfile(info).read()
+            self.position += 1
+            self.recent[info.name] = data
+            if len(self.recent) > self.keep:
+                self.recent.popitem(last=False)
+            if info.name == member:
+                return data
+
+
+@lru_cache(maxsize=8)
+def _tar_stream(archive: str, pid: int) -> TarStream:
+    # one stream per process, like _open_archive
+    return TarStream(archive)
+
+
+def archive_members(archive: str) -> list:
+    """
+    Returns the names of all files in an archive (in archive order)
+    """
+    if is_compressed_tar(archive):
+        with _tar_lock:
+            return list(tar_headers(archive))
+    handle = open_archive(archive)
+    if isinstance(handle, zipfile.ZipFile):
+        return [info.filename for info in handle.infolist() if not info.is_dir()]
+    with _tar_lock:
+        return [member.name for member in handle.getmembers() if member.isfile()]
+
+
+def member_size_and_mtime(archive: str, member: str) -> tuple:
+    """
+    Returns size and modification time of an archive member, the modification time of the archive is used
+    """
+    if is_compressed_tar(archive):
+        with _tar_lock:
+            size = tar_headers(archive)[member]
+        return size, os.stat(archive).st_mtime
+    handle = open_archive(archive)
+    if isinstance(handle, zipfile.ZipFile):
+        size = handle.getinfo(member).file_size
+    else:
+        with _tar_lock:
+            size = handle.getmember(member).size
+    return size, os.stat(archive).st_mtime
+
+
+def file_size_and_mtime(path: str) -> tuple:
+    """
+    Returns size and modification time of a file or archive member
+    """
+    archive_path = split_archive_path(path)
+    if archive_path is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    return member_size_and_mtime(*archive_path)
+
+
+def open_member(archive: str, member: str):
+    """
+    Opens an archive member for reading; zip members are decompressed while reading (streaming), members of
+    compressed tar archives are read from the sequential stream of the archive (see TarStream)
+    """
+    if is_compressed_tar(archive):
+        with _tar_lock:
+            return io.BytesIO(_tar_stream(archive, os.getpid()).read(member))
+    handle = open_archive(archive)
+    if isinstance(handle, zipfile.ZipFile):
+        return handle.open(member)
+    # members of uncompressed tar archives share one file object, they are read completely while holding the lock
+    with _tar_lock:
+        return io.BytesIO(handle.extractfile(member).read())
+
+
+@lru_cache(maxsize=32)
+def read_member(path: str) -> bytes:
+    """
+    Returns the decompressed content of an archive member; the last decoded members are kept in a LRU cache
+    """
+    with open_member(*split_archive_path(path)) as f:
+        return f.read()
+
+
+def open_dicom_file(path: str):
+    """
+    Opens a file or an archive member for binary reading
+    """
+    archive_path = split_archive_path(path)
+    if archive_path is None:
+        return open(path, "rb")
+    return open_member(*archive_path)
+
+
+def output_folder(path: str) -> str:
+    """
+    Folder for the results of a DICOM folder; the results of an archive are written into a folder next to the
+    archive named like the archive without suffix
+    """
+    if not is_archive(path):
+        return path
+    folder = re.sub(r"\.(zip|tar|tar\.gz|tgz|tar\.bz2|tar\.xz)$", "", path, flags=re.I)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def output_path(path: str, suffix: str) -> str:
+    """
+    Path for a result file (e.g. png) belonging to a DICOM file; the results of archive members are written into
+    the output_folder of the archive
+
+    :param path: path to the DICOM file or archive member
+    :param suffix: suffix of the result file (replaces '.dcm')
+    :return: path to the result file
+    """
+    archive_path = split_archive_path(path)
+    if archive_path is not None:
+        archive, member = archive_path
+        path = os.path.join(output_folder(archive), *member.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path.replace(".dcm", suffix)
@@ -0,0 +1,217 @@
+import os
+import sqlite3
+import time
+
+from shortCardiacBackend.DicomArchive import is_archive, file_size_and_mtime
+from shortCardiacBackend.supportFunction import (
+    read_dicom_header,
+    print_scan_rate,
+    walk_files,
+    bounded_map,
+)
+
+COLUMNS = (
+    "path",
+    "size",
+    "mtime",
+    "is_dicom",
+    "sop_instance_uid",
+    "series_instance_uid",
+    "study_instance_uid",
+    "series_description",
+    "modality",
+    "slice_location",
+    "trigger_time",
+    "pixel_spacing_x",
+    "pixel_spacing_y",
+    "rows",
+    "columns",
+)
+
+# DICOM keywords read for the index; the pixel data is never read
+HEADER_TAGS = [
+    "SOPInstanceUID",
+    "SeriesInstanceUID",
+    "StudyInstanceUID",
+    "SeriesDescription",
+    "Modality",
+    "SliceLocation",
+    "TriggerTime",
+    "PixelSpacing",
+    "Rows",
+    "Columns",
+]
+
+
+def _optional_float(value):
+    return None if value is None or value == "" else float(value)
+
+
+def read_header_row(file: str, size: int, mtime: float) -> dict:
+    """
+    Reads the DICOM header (without pixel data) of a file and converts it into a row of the DICOM index
+
+            Parameters:
+                    file (str): path to the file or archive member
+                    size (int): file size in bytes
+                    mtime (float): modification time of the file
+
+            Returns:
+                    row (dict): one value for each entry of COLUMNS; all header values are None for non-DICOM files
+    """
+    row = dict.fromkeys(COLUMNS)
+    row.update(path=os.path.abspath(file), size=size, mtime=mtime)
+    try:
+        ds = read_dicom_header(file, specific_tags=HEADER_TAGS)
+        if ds is None:
+            row["is_dicom"] = 0
+            return row
+        pixel_spacing = ds.get("PixelSpacing")
+        row.update(
+            is_dicom=1,
+            sop_instance_uid=ds.get("SOPInstanceUID"),
+            series_instance_uid=ds.get("SeriesInstanceUID"),
+            study_instance_uid=ds.get("StudyInstanceUID"),
+            series_description=ds.get("SeriesDescription"),
+            modality=ds.get("Modality"),
+            slice_location=_optional_float(ds.get("SliceLocation")),
+            trigger_time=_optional_float(ds.get("TriggerTime")),
+            pixel_spacing_x=None if pixel_spacing is None else float(pixel_spacing[0]),
+            pixel_spacing_y=None if pixel_spacing is None else float(pixel_spacing[1]),
+            rows=ds.get("Rows"),
+            columns=ds.get("Columns"),
+        )
+    except (OSError, EOFError, KeyError, ValueError) as e:
+        # truncated or unreadable files are skipped like non-DICOM files instead of aborting the index update
+        print(f"DICOM index: {file} skipped ({type(e).__name__}: {e})")
+        row = dict.fromkeys(COLUMNS)
+        row.update(path=os.path.abspath(file), size=size, mtime=mtime, is_dicom=0)
+    return row
+
+
+def get_index_path(folder: str, index_file: str) -> str:
+    """
+    Path of the DICOM index of a folder; relative index files are placed in the folder (next to an archive)
+    """
+    if is_archive(folder):
+        return os.path.join(os.path.dirname(folder), index_file)
+    return os.path.join(folder, index_file)
+
+
+class DicomIndex:
+    """
+    Persistent SQLite index of the DICOM headers found in a folder (one row per file).
+    On every update only new or changed files (size or modification time) are read again.
+    """
+
+    def __init__(self, index_file: str):
+        self.index_file = index_file
+        self.connection = sqlite3.connect(index_file)
+        self.connection.row_factory = sqlite3.Row
+        columns = tuple(
+            row["name"]
+            for row in self.connection.execute("PRAGMA table_info(dicoms)")
+        )
+        with self.connection:
+            # indexes written by older versions are missing columns and are rebuilt completely
+            if columns and columns != COLUMNS:
+                self.connection.execute("DROP TABLE dicoms")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS dicoms ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, is_dicom INTEGER, "
+                "sop_instance_uid TEXT, series_instance_uid TEXT, study_instance_uid TEXT, "
+                "series_description TEXT, modality TEXT, slice_location REAL, trigger_time REAL, pixel_spacing_x REAL, pixel_spacing_y REAL, "
+                "rows INTEGER, columns INTEGER)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, path: str):
+        """
+        Returns the indexed row of a file as dict or None if the file is not indexed
+        """
+        row = self.connection.execute(
+            "SELECT * FROM dicoms WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        return None if row is None else dict(row)
+
+    def insert(self, rows: list):
+        """
+        Inserts (or replaces) rows of the DICOM index
+        """
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO dicoms ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                [tuple(row[c] for c in COLUMNS) for row in rows],
+            )
+
+    def select(self, where: str = "1", parameters: tuple = ()) -> set:
+        """
+        Returns the paths of all indexed DICOM files fulfilling a SQL condition (see DicomQuery.where)
+        """
+        return {
+            row["path"]
+            for row in self.connection.execute(
+                f"SELECT path FROM dicoms WHERE is_dicom = 1 AND ({where})", parameters
+            )
+        }
+
+    def update(self, folder: str, fast_mode: bool = False, executor=None) -> list:
+        """
+        Synchronizes the index with the directory tree of folder.
+
+                Parameters:
+                        folder (str): Folder
+                        fast_mode (bool): Only files with the suffix '.dcm' are considered
+                        executor (concurrent.futures.Executor): walks the folder and reads the headers concurrently
+
+                Returns:
+                        rows (list): indexed rows of all DICOM files in the order of os.walk; the key 'file' holds the
+                        path as found by os.walk
+        """
+        folder_abs = os.path.abspath(folder)
+        index_path = os.path.abspath(self.index_file)
+        known = {
+            row["path"]: row
+            for row in self.connection.execute(
+                "SELECT * FROM dicoms WHERE substr(path, 1, ?) = ?",
+                (len(folder_abs) + 1, folder_abs + os.sep),
+            )
+        }
+
+        def index_file(file):
+            size, mtime = file_size_and_mtime(file)
+            row = known.get(os.path.abspath(file))
+            if row is None or row["size"] != size or row["mtime"] != mtime:
+                return read_header_row(file, size, mtime), True
+            return row, False
+
+        start = time.time()
+        rows, changed, found = [], [], set()
+        files = (
+            file
+            for file in walk_files(folder, fast_mode, executor)
+            if os.path.abspath(file) != index_path
+        )
+        for file, (row, is_changed) in bounded_map(index_file, files, executor):
+            found.add(row["path"])
+            if is_changed:
+                changed.append(row)
+            if row["is_dicom"]:
+                rows.append(dict(row, file=file))
+
+        removed = [(path,) for path in known.keys() if path not in found]
+        self.insert(changed)
+        with self.connection:
+            self.connection.executemany("DELETE FROM dicoms WHERE path = ?", removed)
+        print_scan_rate(len(found), len(rows), time.time() - start)
+        print(f"DICOM index: {len(changed)} files (re-)read, {len(removed)} removed")
+        return rows
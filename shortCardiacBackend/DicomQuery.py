@@ -0,0 +1,123 @@
+import json
+import os
+
+from shortCardiacBackend.DicomArchive import file_size_and_mtime
+from shortCardiacBackend.DicomIndex import DicomIndex, read_header_row
+
+
+class DicomQuery:
+    """
+    Header query restricting the DICOM slices which are analysed, e.g. only mid-ventricular slices at end-diastole:
+    DicomQuery(slice_location=(-20, 0), trigger_time=(0, 10)).
+    Every criterion that is None is not restricted; the criteria are combined with AND. Ranges are inclusive and
+    given as (min, max), where one of both limits can be None.
+
+            Parameters:
+                    series_description (str): part of the SeriesDescription (case-insensitive)
+                    slice_location (tuple): range of the SliceLocation in mm
+                    trigger_time (tuple): range of the TriggerTime in ms
+                    modality (str): Modality, e.g. 'MR'
+                    uids (list): SOPInstanceUIDs or SeriesInstanceUIDs of the selected slices
+    """
+
+    def __init__(
+        self,
+        series_description: str = None,
+        slice_location: tuple = None,
+        trigger_time: tuple = None,
+        modality: str = None,
+        uids: list = None,
+    ):
+        self.series_description = series_description
+        self.slice_location = slice_location
+        self.trigger_time = trigger_time
+        self.modality = modality
+        self.uids = None if uids is None else list(uids)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            series_description=config.query_series_description,
+            slice_location=config.query_slice_location,
+            trigger_time=config.query_trigger_time,
+            modality=config.query_modality,
+            uids=config.query_uids,
+        )
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.__dict__.values())
+
+    def where(self) -> tuple:
+        """
+        Translates the query into a SQL condition over the DICOM index
+
+                Returns:
+                        where (str): SQL condition
+                        parameters (tuple): parameters of the placeholders in where
+        """
+        conditions, parameters = [], []
+        if self.series_description is not None:
+            conditions.append("series_description LIKE ?")
+            parameters.append(f"%{self.series_description}%")
+        if self.modality is not None:
+            conditions.append("upper(modality) = upper(?)")
+            parameters.append(self.modality)
+        for column, value_range in (
+            ("slice_location", self.slice_location),
+            ("trigger_time", self.trigger_time),
+        ):
+            if value_range is None:
+                continue
+            minimum, maximum = value_range
+            if minimum is not None:
+                conditions.append(f"{column} >= ?")
+                parameters.append(float(minimum))
+            if maximum is not None:
+                conditions.append(f"{column} <= ?")
+                parameters.append(float(maximum))
+        if self.uids is not None:
+            # the uids are passed as one JSON array, long lists do not exceed the limit of SQL parameters
+            conditions.append(
+                "(sop_instance_uid IN (SELECT value FROM json_each(?))"
+                " OR series_instance_uid IN (SELECT value FROM json_each(?)))"
+            )
+            parameters += [json.dumps([str(uid) for uid in self.uids])] * 2
+        return " AND ".join(conditions) or "1", tuple(parameters)
+
+    def filter(self, dcm_files: list, uis: list, index_file: str = None) -> [list, list]:
+        """
+        Selects the DICOM files matching the query; only the header index is used, no pixel data is read.
+
+                Parameters:
+                        dcm_files (list): paths to the DICOM files (as returned by load_DICOMs)
+                        uis (list): SOPInstanceUID of each file
+                        index_file (str): path to the DICOM index written by load_DICOMs; if None (or if files are
+                        missing in the index), the headers of the files are read
+
+                Returns:
+                        dcm_files (list): selected DICOM files (in the original order)
+                        uis (list): SOPInstanceUID of each selected file
+        """
+        if self.is_empty():
+            return dcm_files, uis
+        with DicomIndex(":memory:" if index_file is None else index_file) as index:
+            paths = [os.path.abspath(dcm_file) for dcm_file in dcm_files]
+            missing = [
+                dcm_file
+                for dcm_file, path in zip(dcm_files, paths)
+                if index.get(path) is None
+            ]
+            index.insert(
+                [
+                    read_header_row(dcm_file, *file_size_and_mtime(dcm_file))
+                    for dcm_file in missing
+                ]
+            )
+            selected = index.select(*self.where())
+        selection = [
+            (dcm_file, ui)
+            for dcm_file, ui, path in zip(dcm_files, uis, paths)
+            if path in selected
+        ]
+        print(f"Header query: {len(selection)} of {len(dcm_files)} DICOM files selected")
+        return [dcm_file for dcm_file, _ in selection], [ui for _, ui in selection]
@@ -0,0 +1,146 @@
+import io
+
+import numpy as np
+import pydicom
+from PIL import Image
+
+from shortCardiacBackend.DicomArchive import split_archive_path, read_member
+
+# Transfer syntaxes whose pixel data is stored as a plain little endian array in the file
+UNCOMPRESSED_TRANSFER_SYNTAXES = (
+    pydicom.uid.ImplicitVRLittleEndian,
+    pydicom.uid.ExplicitVRLittleEndian,
+)
+
+
+class DicomSlice:
+    """
+    DICOM slice which is read only once and shared by all calculation steps (visualization, radiomics,
+    SI conversion, ...) of a ShortCardiac run.
+    The header is parsed directly, the pixel data is only read and decoded on first access of pixel_array.
+    For uncompressed files pixel_array is a read-only numpy.memmap over the pixel data in the file (no copy), unused
+    high bits (e.g. 12 bits stored in 16 bits) are masked like in pydicom.
+    """
+
+    def __init__(self, dcm_file: str, pixel_loader=None):
+        self.dcm_file = dcm_file
+        self.in_archive = split_archive_path(dcm_file) is not None
+        if self.in_archive:
+            # archive members are decompressed completely (LRU cached, see DicomArchive.read_member)
+            self.dataset = pydicom.dcmread(io.BytesIO(read_member(dcm_file)))
+        else:
+            # Large elements (the pixel data) are deferred and read from the file only when they are accessed
+            self.dataset = pydicom.dcmread(dcm_file, defer_size=1024)
+        # Optional function returning the pixel array instead of the file (e.g. a view into a CineStack)
+        self.pixel_loader = pixel_loader
+        self._pixel_array = None
+
+    @property
+    def pixel_array(self):
+        if self._pixel_array is None:
+            if self.pixel_loader is not None:
+                self._pixel_array = self.pixel_loader()
+            else:
+                self._pixel_array = self.read_pixel_data()
+        return self._pixel_array
+
+    def read_pixel_data(self):
+        """
+        Reads the pixel data from the file - memory-mapped for uncompressed files, otherwise decoded by pydicom
+        """
+        pixel_array = self.memmap_pixel_data()
+        return self.dataset.pixel_array if pixel_array is None else pixel_array
+
+    def memmap_pixel_data(self):
+        """
+        Maps the pixel data of uncompressed DICOM files read-only into memory
+
+                Returns:
+                        pixel_array (np.memmap): view on the pixel data in the file or None, if the pixel data has to be
+                        decoded by pydicom (compressed or big endian transfer syntax, color images, packed bits, ...);
+                        with unused high bits (BitsStored < BitsAllocated) a masked copy of the view is returned
+        """
+        ds = self.dataset
+        transfer_syntax = getattr(ds, "file_meta", {}).get("TransferSyntaxUID")
+        if (
+            self.in_archive
+            or transfer_syntax not in UNCOMPRESSED_TRANSFER_SYNTAXES
+            or ds.get("SamplesPerPixel", 1) != 1
+            or ds.get("BitsAllocated") not in (8, 16, 32)
+            # pydicom corrects the sign of signed pixel data with unused high bits
+            or (ds.get("PixelRepresentation") == 1 and ds.BitsStored != ds.BitsAllocated)
+            or ds.get("HighBit", ds.BitsStored - 1) != ds.BitsStored - 1
+        ):
+            return None
+        try:
+            elem = ds.get_item("PixelData", keep_deferred=True)
+        except TypeError:  # pydicom < 3 does not convert deferred elements in get_item
+            elem = ds.get_item("PixelData")
+        value_tell = getattr(elem, "value_tell", None)
+        if value_tell is None:
+            return None
+        frames = int(ds.get("NumberOfFrames", 1) or 1)
+        shape = self.shape if frames == 1 else (frames,) + self.shape
+        dtype = np.dtype(
+            f"<{'i' if ds.PixelRepresentation == 1 else 'u'}{ds.BitsAllocated // 8}"
+        )
+        if elem.length < np.prod(shape) * dtype.itemsize:
+            return None
+        pixel_array = np.memmap(
+            self.dcm_file, dtype=dtype, mode="r", offset=value_tell, shape=shape
+        )
+        if ds.BitsStored < ds.BitsAllocated:
+            # the unused high bits may contain other data (e.g. overlays), pydicom masks them
+            return np.bitwise_and(pixel_array, (1 << ds.BitsStored) - 1, dtype=dtype)
+        return pixel_array
+
+    @property
+    def uid(self) -> str:
+        return self.dataset.SOPInstanceUID
+
+    @property
+    def shape(self) -> tuple:
+        return int(self.dataset.Rows), int(self.dataset.Columns)
+
+    @property
+    def pixel_spacing(self) -> dict:
+        """
+        Get pixel spacing of dicom file
+
+        :return: spacing (dict): x = x_spacing, y = y_spacing
+        """
+        return {
+            "x": float(self.dataset.PixelSpacing[0]),
+            "y": float(self.dataset.PixelSpacing[1]),
+        }
+
+    def as_PIL(self, resize_factor: int = 1) -> Image.Image:
+        """
+        Returns resized dicom image as Pillow RGB Image
+
+                Parameters:
+                        resize_factor (int): rescaling factor for DICOM images
+
+                Returns:
+                        dcm_img (Pillow Image): dcm_image as RGB image
+        """
+        dicom = self.pixel_array.astype("float32")
+
+        # rescale DICOM image to RGB scaling
+        dicom_rgb = dicom / dicom.max() * 255
+
+        # resizing and converting to RGB
+        return (
+            Image.fromarray(dicom_rgb)
+            .resize((dicom.shape[1] * resize_factor, dicom.shape[0] * resize_factor))
+            .convert("RGB")
+        )
+
+
+def as_dicom_slice(dicom) -> DicomSlice:
+    """
+    Returns the DicomSlice for a path to a dicom file; already parsed slices are passed through unchanged.
+    """
+    if isinstance(dicom, DicomSlice):
+        return dicom
+    return DicomSlice(dicom)
@@ -2,7 +2,8 @@ from abc import ABC
 
 import matplotlib.pyplot as plt
 
-from shortCardiacBackend.loadAndSave import load_dcm_as_PIL
+from shortCardiacBackend.DicomArchive import output_path
+from shortCardiacBackend.DicomSlice import as_dicom_slice
 from shortCardiacBackend.radiomics import calc_mask_of_polygon_for_radiomics, calc_radiomics
 from shortCardiacBackend.ShowCalculationsStepByStep import *
 from shortCardiacBackend.SIConvertion import convert_params
@@ -36,13 +37,16 @@ def check_coords(coords, config):
 class ShortCardiac(ABC):
     def __init__(self, config, dcm_file, coords):
         self.config = config
-        self.dcm_file = dcm_file
+        # The DICOM file is parsed only once; all subsequent steps work on this DicomSlice.
+        self.dicom = as_dicom_slice(dcm_file)
+        self.dcm_file = self.dicom.dcm_file
 
         self.calculable = check_coords(coords, config)
         # show_segmentation(config, load_dcm_as_PIL(dcm_file, 1), coords)
 
-        # Read in the dcm_image as a PILLOW image for the visualization of the calculations.
-        self.dcm_img = load_dcm_as_PIL(dcm_file, config.resize_polygon_factor)
+        # The dcm_image as a PILLOW image for the visualization of the calculations is only created on first
+        # access of self.dcm_img, i.e. pure morphometric runs never decode the pixel data.
+        self._dcm_img = None
         coords_resizing(coords, config.resize_polygon_factor, config.smooth_resizing)
         self.showCalculationStepByStep = False
 
@@ -52,15 +56,12 @@ class ShortCardiac(ABC):
             if coords["sacardialRefPoint"] is None:
                 self.calculable = False
 
-        if not self.calculable:
-            self.dcm_img = show_segmentation(
-                config, load_dcm_as_PIL(dcm_file, config.resize_polygon_factor), coords
+        if not self.calculable and self.config.save_pngs:
+            self.dcm_img = show_segmentation(config, self.dcm_img, coords)
+            self.dcm_img.save(
+                output_path(self.dcm_file, ".png"),
+                transparent=self.config.img_transparent,
             )
-            if self.config.save_pngs:
-                self.dcm_img.save(
-                    self.dcm_file.replace(".dcm", ".png"),
-                    transparent=self.config.img_transparent,
-                )
 
         if self.calculable:
             if self.showCalculationStepByStep:
@@ -94,7 +95,10 @@ class ShortCardiac(ABC):
             #    self.showCalculationStepByStep = True
             # else:
             #    self.showCalculationStepByStep = False
-            center_img = (self.dcm_img.size[0] / 2, self.dcm_img.size[1] / 2)
+            center_img = (
+                self.dicom.shape[1] * config.resize_polygon_factor / 2,
+                self.dicom.shape[0] * config.resize_polygon_factor / 2,
+            )
             if self.config.DEBUG:
                 print(
                     f"ORGINAL DICOM IMAGE (left) AND DICOM IMAGE (right) AFTER THE HEART AXIS HAS BEEN CORRECTED BY {septum_angle}°."
@@ -221,13 +225,24 @@ class ShortCardiac(ABC):
         self.merged_params = None
         self.merged_param_names = None
 
+    @property
+    def dcm_img(self):
+        if self._dcm_img is None:
+            self._dcm_img = self.dicom.as_PIL(self.config.resize_polygon_factor)
+        return self._dcm_img
+
+    @dcm_img.setter
+    def dcm_img(self, img):
+        self._dcm_img = img
+
     def run(self):
         if not self.calculable:
             self.merge_results()
             return self.dcm_file, [], self.merged_param_names
         try:
             # if True:
-            self.feature_extraction()
+            if self.config.calc_features:
+                self.feature_extraction()
             self.quantitative_septum_evaluation()
             self.quantitative_right_ventricle_evaluation()
             self.quantitative_saendocardial_contour_evaluation()
@@ -242,20 +257,20 @@ class ShortCardiac(ABC):
 
     def generate_mask(self):
         right_ventricel_mask = calc_mask_of_polygon_for_radiomics(
-            self.dcm_file,
+            self.dicom,
             self.coords,
             self.config.rv_name_or_nr,
             self.config.resize_polygon_factor,
         )
         saendocardialContour_mask = calc_mask_of_polygon_for_radiomics(
-            self.dcm_file,
+            self.dicom,
             self.coords,
             self.config.lv_endo_name_or_nr,
             self.config.resize_polygon_factor,
         )
         saepicardialContour_mask = (
                 calc_mask_of_polygon_for_radiomics(
-                self.dcm_file,
+                self.dicom,
                 self.coords,
                 self.config.lv_epi_name_or_nr,
                 self.config.resize_polygon_factor,
@@ -271,19 +286,19 @@ class ShortCardiac(ABC):
             saepicardialContour_mask,
         ) = self.generate_mask()
         right_ventricel_feature = calc_radiomics(
-            self.dcm_file,
+            self.dicom,
             right_ventricel_mask,
             name=self.config.rv_name_or_nr,
             normalize=True,
         )
         saendocardialContour_feature = calc_radiomics(
-            self.dcm_file,
+            self.dicom,
             saendocardialContour_mask,
             name=self.config.lv_endo_name_or_nr,
             normalize=True,
         )
         saepicardialContour_feature = calc_radiomics(
-            self.dcm_file,
+            self.dicom,
             saepicardialContour_mask,
             name=self.config.lv_epi_name_or_nr,
             normalize=True,
@@ -656,7 +671,7 @@ class ShortCardiac(ABC):
             )
             if self.config.save_pngs:
                 self.dcm_img.save(
-                    self.dcm_file.replace(".dcm", ".png"),
+                    output_path(self.dcm_file, ".png"),
                     transparent=self.config.img_transparent,
                 )
             else:
@@ -666,7 +681,7 @@ class ShortCardiac(ABC):
             """---------------------------------------------------------------------------------------------------------"""
             """ Conversion of the determined parameters into SI units """
             """ ---------------------------------------------------------------------------------------------------------"""
-            pixel_spacing = get_pixel_spacing(self.dcm_file)
+            pixel_spacing = get_pixel_spacing(self.dicom)
             line_params = flatted_list(line_params)
 
             params = convert_params(
@@ -699,14 +714,13 @@ class ShortCardiac(ABC):
 
         self.dcm_file = self.dcm_file
         if self.calculable:
-            self.merged_params = (
-                [self.septum_angle]
-                + flatted_list(params)
-                + EIs
-                + self.radiomc_feature["right_ventricel"][0]
-                + self.radiomc_feature["saendocardialContour"][0]
-                + self.radiomc_feature["saepicardialContour_feature"][0]
-            )
+            self.merged_params = [self.septum_angle] + flatted_list(params) + EIs
+            if self.config.calc_features:
+                self.merged_params += (
+                    self.radiomc_feature["right_ventricel"][0]
+                    + self.radiomc_feature["saendocardialContour"][0]
+                    + self.radiomc_feature["saepicardialContour_feature"][0]
+                )
         else:
             self.merged_params = None
         # + params_dicom_tags
@@ -730,10 +744,10 @@ def read_dicom_tags(file):
     """
     Reading out parameters stored in DicomTags
 
-    :param file: string with path to dicom image
+    :param file: string with path to dicom image or already parsed DicomSlice
     :return:
     """
-    ds = pydicom.dcmread(file)
+    ds = as_dicom_slice(file).dataset
     Trigger_time = ds[0x0018, 0x1060].value
     InstanceNumber = ds[0x0019, 0x0001].value
     # custom, custom_name = [], []
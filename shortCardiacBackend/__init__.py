@@ -1,5 +1,16 @@
 from shortCardiacBackend.CoordReader import CoordReader
 from shortCardiacBackend.Config import RunConfiguration
+from shortCardiacBackend.CoordStore import CoordStore, convert_pkl_to_store
+from shortCardiacBackend.DicomSlice import DicomSlice
+from shortCardiacBackend.DicomIndex import DicomIndex, get_index_path
+from shortCardiacBackend.DicomQuery import DicomQuery
 from shortCardiacBackend.ShortCardiac import ShortCardiac
-from shortCardiacBackend.supportFunction import parse_to_arguments
+from shortCardiacBackend.CineStack import CineStack, series_of_DICOMs
+from shortCardiacBackend.supportFunction import (
+    build_uid_index,
+    match_coordinates,
+    iter_arguments,
+    parse_to_arguments,
+    parse_to_series_arguments,
+)
 from shortCardiacBackend.loadAndSave import load_DICOMs, save, generate_mp4
@@ -1,67 +1,90 @@
 import csv
 import glob
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import pandas as pd
 import numpy as np
 
 import moviepy.video.io.ImageSequenceClip
-import pydicom
-from PIL import Image
 from natsort.natsort import natsorted
 
-from shortCardiacBackend.supportFunction import is_file_a_dicom, adjust_gamma
-
-
-def load_DICOMs(folder: str, fast_mode: bool = False) -> [list, list]:
+from shortCardiacBackend.DicomArchive import output_folder
+from shortCardiacBackend.DicomIndex import DicomIndex, get_index_path
+from shortCardiacBackend.DicomSlice import as_dicom_slice
+from shortCardiacBackend.supportFunction import (
+    read_dicom_header,
+    print_scan_rate,
+    walk_files,
+    bounded_map,
+    adjust_gamma,
+)
+
+
+def load_DICOMs(
+    folder: str, fast_mode: bool = False, index_file: str = None, worker: int = 0
+) -> [list, list]:
     """
     Read out all Dicom files in the directory and all subdirectories.
 
          Parameters:
-                folder (str): Folder
+                folder (str): Folder or zip/tar archive; archives in the folder are read like subdirectories
                 fast_mode (bool): Specifies that all Dicom images have the suffix '*.dcm'; this allows much faster browsing of the directory tree.
+                index_file (str): SQLite index of the DICOM headers (relative paths are placed in folder); only new or
+                changed files are read. If None, all files are read.
+                worker (int): Number of threads walking the directory tree and reading the headers (0 = sequential).
+                The order of the returned files does not depend on the number of threads.
 
         Returns:
             dcms = list of all found Dicom files
             uis = list with all imported dicom uis
     """
     print("Start loading of DICOM images")
-    # load list with all dicom files
-    dcms, uis = [], []
-    for (dirpath, dirnames, filenames) in os.walk(folder):
-        for filename in filenames:
-            if fast_mode and os.path.splitext(filename)[-1] == "dcm":
-                continue
-            dcm_file = os.path.join(dirpath, filename)
+    with ThreadPoolExecutor(worker) if worker > 0 else nullcontext() as executor:
+        if index_file is not None:
+            with DicomIndex(get_index_path(folder, index_file)) as index:
+                rows = index.update(folder, fast_mode, executor)
+            return [row["file"] for row in rows], [
+                row["sop_instance_uid"] for row in rows
+            ]
+
+        # load list with all dicom files; only the file preamble and the header up to the SOPInstanceUID are read
+        def read_uid(dcm_file):
+            try:
+                ds = read_dicom_header(dcm_file, specific_tags=["SOPInstanceUID"])
+            except (OSError, EOFError, KeyError, ValueError) as e:
+                # truncated or unreadable files are skipped
+                print(f"{dcm_file} skipped ({type(e).__name__}: {e})")
+                return None
+            return None if ds is None else ds.SOPInstanceUID
+
+        start, n_files = time.time(), 0
+        dcms, uis = [], []
+        for dcm_file, ui in bounded_map(
+            read_uid, walk_files(folder, fast_mode, executor), executor
+        ):
+            n_files += 1
             # Checks if the file is a DICOM file; if so, the file and ui will saved
-            if is_file_a_dicom(dcm_file):
-                uis.append(pydicom.dcmread(dcm_file).SOPInstanceUID)
+            if ui is not None:
+                uis.append(ui)
                 dcms.append(dcm_file)
+    print_scan_rate(n_files, len(dcms), time.time() - start)
     return dcms, uis
 
 
-def load_dcm_as_PIL(dcm_file: str, resize_factor: int = 1):
+def load_dcm_as_PIL(dcm_file, resize_factor: int = 1):
     """
     Returns resized dicom image as Pillow RGB Image
 
             Parameters:
-                    dcm_file (str): Path to dicom image
+                    dcm_file (str | DicomSlice): Path to dicom image or already parsed dicom slice
                     resize_factor (int): rescaling factor for DICOM images
 
             Returns:
                     dcm_img (Pillow Image): dcm_image as RGB image
     """
-
-    dicom = pydicom.dcmread(dcm_file).pixel_array.astype("float32")
-
-    # rescale DICOM image to RGB scaling
-    dicom_rgb = dicom / dicom.max() * 255
-
-    # resizing and converting to RGB
-    return (
-        Image.fromarray(dicom_rgb)
-        .resize((dicom.shape[1] * resize_factor, dicom.shape[0] * resize_factor))
-        .convert("RGB")
-    )
+    return as_dicom_slice(dcm_file).as_PIL(resize_factor)
 
 
 def save(results, dicom_folder):
@@ -108,8 +131,8 @@ def customized_saving_technical_note(results, dicom_folder):
                 + "\n"
             )
             first_img = False
-        df = pydicom.dcmread(file)
-        Mode = file.replace(dicom_folder, "").split("\\")[1]
+        # first folder below the DICOM folder, "/" and "\" are both separators
+        Mode = file.replace(dicom_folder, "").replace("\\", "/").split("/")[1]
         string_results += (
             Mode
             + ";"
@@ -121,9 +144,10 @@ def customized_saving_technical_note(results, dicom_folder):
     if first_img:
         print("Error")
         return None
-    with open(dicom_folder + r"\results_de.csv", "w+") as csv_file:
+    results_folder = output_folder(dicom_folder)
+    with open(os.path.join(results_folder, "results_de.csv"), "w+") as csv_file:
         csv_file.writelines(string_results)
-    with open(dicom_folder + r"\results_eng.csv", "w+") as csv_file:
+    with open(os.path.join(results_folder, "results_eng.csv"), "w+") as csv_file:
         csv_file.writelines(string_results.replace(",", "."))
 
 
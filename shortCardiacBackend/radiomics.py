@@ -1,27 +1,27 @@
 import SimpleITK as sitk
 import numpy as np
-import pydicom
 import radiomics
 import six
 from PIL import Image, ImageDraw
 from radiomics import firstorder, glcm, glrlm, glszm, shape2D
 from radiomics import setVerbosity
+from shortCardiacBackend.DicomSlice import as_dicom_slice
 from shortCardiacBackend.supportFunction import flatted_list
 
 
 def calc_mask_of_polygon_for_radiomics(
-    dcm_img: str, coords: dict, name: str, resize_polygon_factor: int
+    dcm_img, coords: dict, name: str, resize_polygon_factor: int
 ) -> np.ndarray:
     """
 
-    :param dcm_img: path to DICOM image
+    :param dcm_img: path to DICOM image or already parsed DicomSlice
     :param coords: dict with all segmentation coordinates
     :param name: name of segmentation - key for coords dict
     :param resize_polygon_factor: factor between segmentation coords and original DICOM image
 
     :return: bool mask with ones and zeros
     """
-    dcm_shape = pydicom.dcmread(dcm_img).pixel_array.shape
+    dcm_shape = as_dicom_slice(dcm_img).shape
     img = Image.new("L", (dcm_shape[1], dcm_shape[0]), 0)
     img_draw = ImageDraw.Draw(img)
     c = tuple(
@@ -35,11 +35,13 @@ def calc_mask_of_polygon_for_radiomics(
 
 
 def calc_radiomics(
-    dcm_file: str, mask: np.ndarray, name: str, normalize: bool = False, cf: dict = None
+    dcm_file, mask: np.ndarray, name: str, normalize: bool = False, cf: dict = None
 ):
     """
     function for calculation of radiomcs features - wrapper fuction for pyradiomics
 
+    :param dcm_file: path to DICOM image or already parsed DicomSlice
+
     more information: https://pyradiomics.readthedocs.io/en/latest/
     """
 
@@ -52,7 +54,7 @@ def calc_radiomics(
             "glszm_feature": True,
         }
     setVerbosity(60)
-    dcm_sitk = sitk.GetImageFromArray(pydicom.dcmread(dcm_file).pixel_array)
+    dcm_sitk = sitk.GetImageFromArray(as_dicom_slice(dcm_file).pixel_array)
     if normalize:
         dcm_sitk = radiomics.imageoperations.normalizeImage(dcm_sitk)
     mask_sitk = sitk.GetImageFromArray(mask)
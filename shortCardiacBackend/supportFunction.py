@@ -1,5 +1,15 @@
+import os
+from collections import deque
+
 import pydicom
 
+from shortCardiacBackend.DicomArchive import (
+    is_archive,
+    archive_members,
+    open_dicom_file,
+)
+from shortCardiacBackend.DicomSlice import as_dicom_slice
+
 
 def adjust_gamma(image, gamma=1.0):
     """
@@ -16,17 +26,15 @@ def adjust_gamma(image, gamma=1.0):
     return image
 
 
-def get_pixel_spacing(file: str):
+def get_pixel_spacing(dicom):
     """
     Get pixel spacing of dicom file
 
-    :param: file (str):  path to the file to identify
+    :param: dicom (str | DicomSlice):  path to the file or already parsed dicom slice
 
     :return: spacing (dict): x = x_spacing, y = y_spacing
     """
-    x_space = float(pydicom.dcmread(file).PixelSpacing[0])
-    y_space = float(pydicom.dcmread(file).PixelSpacing[1])
-    return {"x": x_space, "y": y_space}
+    return as_dicom_slice(dicom).pixel_spacing
 
 
 def flatted_list(lists):
@@ -42,21 +50,222 @@ def flatted_list(lists):
     return flat_list
 
 
+def has_dicom_preamble(file):
+    """
+    check the 128-byte preamble followed by the 'DICM' marker of a DICOM Part 10 file without parsing the file
+
+    :param file: path to the file (or archive member) to identify
+    :return: True if the marker is present, False otherwise
+    """
+    try:
+        with open_dicom_file(file) as f:
+            return f.read(132)[128:] == b"DICM"
+    except (OSError, KeyError):
+        return False
+
+
+def read_dicom_header(file, specific_tags=None):
+    """
+    read the DICOM header of a file without pixel data
+
+    :param file: path to the file (or archive member, which is read as stream)
+    :param specific_tags: list of DICOM keywords to read, all tags are read if None
+    :return: pydicom dataset without pixel data or None if the file is not a DICOM file
+    """
+    if not has_dicom_preamble(file):
+        return None
+    try:
+        with open_dicom_file(file) as f:
+            return pydicom.dcmread(
+                f, stop_before_pixels=True, specific_tags=specific_tags
+            )
+    except pydicom.errors.InvalidDicomError:
+        return None
+
+
 def is_file_a_dicom(file):
     """
-    check if a file is a DICOM file
+    check if a file is a DICOM file (only the header is read, the pixel data is not decoded)
 
     :param file: path to the file to identify
     :return: is_dicom - True if the file is DICOM, False otherwise
     """
+    return read_dicom_header(file, specific_tags=["SOPInstanceUID"]) is not None
+
+
+def list_directory(folder):
+    """
+    list a directory in the same way as os.walk
+
+    :param folder: path to the directory
+    :return: files (list), subdirectories to descend into (list) - both in directory order
+    """
+    files, subdirs = [], []
     try:
-        pydicom.dcmread(file)
-    except pydicom.errors.InvalidDicomError:
-        return False
-    return True
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append(entry.name)
+                elif not entry.is_symlink():
+                    subdirs.append(os.path.join(folder, entry.name))
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def walk_files(folder, fast_mode=False, executor=None):
+    """
+    Generator over all files in folder and all subdirectories in the order of os.walk.
+    If an executor is given, the subdirectories are listed concurrently.
+    Zip and tar archives are treated like folders, their members are returned as '<archive>/<member>'.
+
+    :param folder: Folder or archive
+    :param fast_mode: only files with the suffix '.dcm' are returned
+    :param executor: concurrent.futures.Executor or None for a sequential walk
+    :return: generator of file paths
+    """
+
+    def submit(directory):
+        if executor is None:
+            return directory, list_directory(directory)
+        return directory, executor.submit(list_directory, directory)
+
+    def files_of(directory, filenames):
+        for filename in filenames:
+            file = os.path.join(directory, filename)
+            if is_archive(file):
+                yield from files_of(file, archive_members(file))
+            elif not fast_mode or os.path.splitext(filename)[-1].lower() == ".dcm":
+                yield file
+
+    def visit(directory, listing):
+        files, subdirs = listing if executor is None else listing.result()
+        # the listings of all subdirectories are requested before the files are handed out
+        subdirs = [submit(subdir) for subdir in subdirs]
+        yield from files_of(directory, files)
+        for subdir, sub_listing in subdirs:
+            yield from visit(subdir, sub_listing)
+
+    if is_archive(folder):
+        yield from files_of(folder, archive_members(folder))
+    else:
+        yield from visit(*submit(folder))
+
+
+def bounded_map(function, iterable, executor=None, max_pending=64):
+    """
+    Generator applying function to all items of iterable, results are returned in the input order.
+    If an executor is given, at most max_pending items are processed concurrently (bounded queue).
+
+    :param function: function with one argument
+    :param iterable: input items
+    :param executor: concurrent.futures.Executor or None for a sequential map
+    :param max_pending: maximal number of submitted but not yet returned items
+    :return: generator of (item, result) tuples
+    """
+    if executor is None:
+        for item in iterable:
+            yield item, function(item)
+        return
+    pending = deque()
+    for item in iterable:
+        pending.append((item, executor.submit(function, item)))
+        if len(pending) >= max_pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def print_scan_rate(n_files: int, n_dicoms: int, duration: float) -> None:
+    """
+    Prints the throughput of the DICOM discovery
+
+    :param n_files: number of scanned files
+    :param n_dicoms: number of found DICOM files
+    :param duration: duration of the scan in seconds
+    """
+    rate = n_files / duration if duration > 0 else float("inf")
+    print(
+        f"{n_files} files scanned in {duration:.2f} s ({rate:.0f} files/s), {n_dicoms} DICOM files found"
+    )
 
 
-def parse_to_arguments(config, coords, dicom_files, uis):
+def build_uid_index(dicom_files: list, uis: list) -> dict:
+    """
+    Maps every Dicom UI to its Dicom file (built once, O(1) lookups); for duplicated UIs the first file is used
+
+            Parameters:
+                    dicom_files (list): List of paths to the Dicom files (as returned by load_DICOMs)
+                    uis (list): List with all imported Dicom UIs
+
+            Returns:
+                    uid_index (dict): Dicom UI -> path to the Dicom file
+    """
+    uid_index = {}
+    for dcm_file, ui in zip(dicom_files, uis):
+        uid_index.setdefault(ui, dcm_file)
+    return uid_index
+
+
+def report_unmatched_uids(coords: dict, uid_index: dict) -> [list, list]:
+    """
+    Prints how many coordinate UIs have no Dicom file and how many Dicom files have no coordinates
+
+            Returns:
+                    coords_without_dicom (list): coordinate UIs without Dicom file
+                    dicoms_without_coords (list): Dicom UIs without coordinates
+    """
+    coords_without_dicom = [ui for ui in coords.keys() if ui not in uid_index]
+    dicoms_without_coords = [ui for ui in uid_index.keys() if ui not in coords]
+    if len(coords_without_dicom) > 0:
+        print(
+            f"WARNING: {len(coords_without_dicom)} coordinate UIs without Dicom file, "
+            f"e.g. {coords_without_dicom[0]}"
+        )
+    if len(dicoms_without_coords) > 0:
+        print(f"{len(dicoms_without_coords)} Dicom files without coordinates")
+    return coords_without_dicom, dicoms_without_coords
+
+
+def match_coordinates(config, coords: dict, uid_index: dict) -> list:
+    """
+    Returns the UIs with coordinates and Dicom file in the order of coords and reports all unmatched UIs.
+    Note: In DEBUG mode, the number of returned UIs is reduced to 1.
+    """
+    report_unmatched_uids(coords, uid_index)
+    matched_uis = [ui for ui in coords.keys() if ui in uid_index]
+    if config.DEBUG:
+        print("WARNING: DEBUG_MODE ONLY REDUCED LIST OF ARGUMENTS FOR THE CALCULATIONS")
+        matched_uis = matched_uis[:1]
+    return matched_uis
+
+
+def iter_arguments(config, coords: dict, uid_index: dict, matched_uis: list = None):
+    """
+    Generator of the arguments for the later calculations, so that the calculations can start before all
+    arguments exist (e.g. with Pool.imap_unordered)
+
+            Parameters:
+                    coords (dict): Dictionary with dicom_ui as key, where the extracted coordinates are stored
+                    uid_index (dict): Dicom UI -> path to the Dicom file (see build_uid_index)
+                    matched_uis (list): UIs to calculate (see match_coordinates); if None, they are matched here
+
+            Yields:
+                    args (tuple): (config, path to dicom file (str), Coordinates (dict))
+    """
+    if matched_uis is None:
+        matched_uis = match_coordinates(config, coords, uid_index)
+    for ui in matched_uis:
+        yield config, uid_index[ui], coords.get(ui)
+
+
+def parse_to_arguments(config, coords, dicom_files, uis, uid_index=None):
     """
     Arranges the imported coordinates and dicom_files into tuples for the later calculations.
     Note: In DEBUG mode, the number of returned arguments is reduced to 1.
@@ -65,23 +274,37 @@ def parse_to_arguments(config, coords, dicom_files, uis):
                     coords (dict): Dictionary with dicom_ui as key, where the extracted coordinates are stored
                     dicom_files (list): List of paths to the Dicom files
                     uis (list): List with all imported Dicom UIs
+                    uid_index (dict): already built UID index of dicom_files (see build_uid_index)
 
             Returns:
                     args (tuple): (path to dicom file (str), Coordinates (dict))
     """
+    if uid_index is None:
+        uid_index = build_uid_index(dicom_files, uis)
+    return list(iter_arguments(config, coords, uid_index))
 
-    def clear_keys(keys, uis):
-        out_keys = []
-        for key in keys:
-            if key in uis:
-                out_keys.append(key)
-        return out_keys
 
-    args = [
-        (config, dicom_files[uis.index(ui)], coords.get(ui))
-        for ui in clear_keys(coords.keys(), uis)
-    ]
-    if config.DEBUG:
-        print("WARNING: DEBUG_MODE ONLY REDUCED LIST OF ARGUMENTS FOR THE CALCULATIONS")
-        args = args[:1]
-    return args
+def parse_to_series_arguments(
+    config, coords, dicom_files, uis, series_uids, uid_index=None
+):
+    """
+    Arranges the imported coordinates and dicom_files into one tuple per series, so that all slices of a series are
+    calculated by one process (see CineStack).
+
+            Parameters:
+                    coords (dict): Dictionary with dicom_ui as key, where the extracted coordinates are stored
+                    dicom_files (list): List of paths to the Dicom files
+                    uis (list): List with all imported Dicom UIs
+                    series_uids (list): List with the SeriesInstanceUID of each Dicom file
+                    uid_index (dict): already built UID index of dicom_files (see build_uid_index)
+
+            Returns:
+                    args (tuple): (config, list of (path to dicom file (str), Coordinates (dict)))
+    """
+    series_of_file = dict(zip(dicom_files, series_uids))
+    series = {}
+    for _, dcm_file, coord in parse_to_arguments(
+        config, coords, dicom_files, uis, uid_index
+    ):
+        series.setdefault(series_of_file[dcm_file], []).append((dcm_file, coord))
+    return [(config, slices) for slices in series.values()]
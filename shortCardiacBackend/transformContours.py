@@ -1,25 +1,67 @@
 import itertools
 
 import SimpleITK as sitk
+import cv2
 import numpy as np
-import pydicom
 from PIL import Image, ImageDraw
-from imantics import Mask
 from numba import jit
 from scipy.interpolate import splprep, splev
+from scipy.spatial import cKDTree
 from skimage.transform import resize
 
+from shortCardiacBackend.DicomSlice import as_dicom_slice
 from shortCardiacBackend.transformPointsAndVectors import (
     find_smallest_distance_to_ref,
-    clean_points,
     get_line,
     rotate_points,
     length,
+    lengths,
     get_vector,
     calc_center_of_2_points,
 )
 
 
+def column_extents(roi, delta: int = 1):
+    """
+    Vertical extent of a contour per x-column (x-coordinates truncated to int), every column is merged with its
+    neighbouring columns (x - delta ... x + delta)
+
+    :param roi: list of points as np.array or np.array with shape (N, 2)
+    :param delta: delta of x-values allowed to fill gaps and stabilize calculations concerning single contour points
+
+    :return: columns (np.array): all x-values from the smallest to the largest x-coordinate
+             present (np.array): True if a point has the x-value of the column
+             y_max (np.array): largest y-coordinate of the merged columns
+             y_min (np.array): smallest y-coordinate of the merged columns
+             counts (np.array): number of points of the merged columns
+    """
+    roi = np.asarray(roi, dtype=float).reshape(-1, 2)
+    if len(roi) == 0:
+        empty = np.zeros(0)
+        return empty.astype(int), empty.astype(bool), empty, empty, empty.astype(int)
+    x = np.trunc(roi[:, 0]).astype(int)
+    order = np.argsort(x, kind="stable")
+    x, y = x[order], roi[order, 1]
+    starts = np.flatnonzero(np.r_[True, x[1:] != x[:-1]])
+    columns = np.arange(x[0], x[-1] + 1)
+    # columns without points stay empty, delta empty columns on both sides for the merging
+    index = x[starts] - x[0] + delta
+    size = len(columns) + 2 * delta
+    column_max, column_min = np.full(size, -np.inf), np.full(size, np.inf)
+    column_counts = np.zeros(size, dtype=int)
+    column_max[index] = np.maximum.reduceat(y, starts)
+    column_min[index] = np.minimum.reduceat(y, starts)
+    column_counts[index] = np.diff(np.r_[starts, len(x)])
+    y_max, y_min = np.full(len(columns), -np.inf), np.full(len(columns), np.inf)
+    counts = np.zeros(len(columns), dtype=int)
+    for shift in range(2 * delta + 1):
+        window = slice(shift, shift + len(columns))
+        y_max = np.maximum(y_max, column_max[window])
+        y_min = np.minimum(y_min, column_min[window])
+        counts += column_counts[window]
+    return columns, column_counts[delta : delta + len(columns)] > 0, y_max, y_min, counts
+
+
 def order_roi_to_dict(roi: list, delta: int = 1):
     """
     Sorting of points concerning x-coordinate
@@ -27,23 +69,23 @@ def order_roi_to_dict(roi: list, delta: int = 1):
     :param roi: list of points as np.array
     :param delta: delta of x-values allowed to fill gaps and stabilize calculations concerning single contour points
 
-    :return: point_dict_out (dict): Dictionary in which points are stored that have the same x-coordinate
+    :return: point_dict_out (dict): Dictionary with the x-coordinates (str) of the points as keys and the
+             highest point, the lowest point and their distance of the column (see column_extents) or None
+             for less than two points as values
     """
-    point_dict = {}
-    for point in roi:
-        x_key = str(int(float(point[0])))
-        if x_key not in point_dict.keys():
-            point_dict[x_key] = [point]
-        else:
-            point_dict[x_key].append(point)
+    columns, _, y_max, y_min, counts = column_extents(roi, delta)
+    # keys in order of the points
+    x = np.trunc(np.asarray(roi, dtype=float).reshape(-1, 2)[:, 0]).astype(int)
+    _, first = np.unique(x, return_index=True)
     point_dict_out = {}
-    for key in point_dict.keys():
-        points_list = []
-        for i in range(-delta, delta + 1):
-            points = point_dict.get(str(int(float(key)) + i))
-            if points is not None:
-                points_list += points
-        point_dict_out[key] = clean_points(points_list, key)
+    for key in x[np.sort(first)]:
+        i = key - columns[0]
+        if counts[i] < 2:
+            point_dict_out[str(key)] = None
+            continue
+        p1 = np.array([key, y_max[i]]).round().astype("int16")
+        p2 = np.array([key, y_min[i]]).round().astype("int16")
+        point_dict_out[str(key)] = (p1, p2, length(get_vector(p1, p2)))
     return point_dict_out
 
 
@@ -101,36 +143,176 @@ def coords_resizing(
         )
 
 
+def close_point_pairs(points_1, points_2, max_distance):
+    """
+    Searches all pairs (p, q) of p in points_1 and q in points_2 with a distance below max_distance (KD-tree)
+
+            Parameters:
+                    points_1 (np.array): np-array with shape (n, 2)
+                    points_2 (np.array): np-array with shape (m, 2)
+                    max_distance (float): upper limit of the distance
+
+            Returns:
+                    index_1 (np.array): indices in points_1
+                    index_2 (np.array): indices in points_2
+                    distances (np.array): distances of the pairs (see length)
+            The pairs are ordered like itertools.product(points_1, points_2).
+    """
+    points_1, points_2 = np.asarray(points_1), np.asarray(points_2)
+    if len(points_1) == 0 or len(points_2) == 0:
+        empty = np.zeros(0, dtype=int)
+        return empty, empty, np.zeros(0)
+    # slightly larger radius, the exact limit is checked with the same arithmetic as length
+    neighbours = cKDTree(points_1).query_ball_tree(
+        cKDTree(points_2), max_distance * (1 + 1e-9)
+    )
+    index_1 = np.repeat(np.arange(len(points_1)), [len(n) for n in neighbours])
+    index_2 = np.array([j for n in neighbours for j in n], dtype=int)
+    order = np.lexsort((index_2, index_1))
+    index_1, index_2 = index_1[order], index_2[order]
+    distances = lengths(points_1[index_1] - points_2[index_2])
+    close = distances < max_distance
+    return index_1[close], index_2[close], distances[close]
+
+
+def farthest_pair_brute_force(points):
+    """
+    Farthest pair of points by comparing all ordered pairs, reference for farthest_pair
+
+            Parameters:
+                    points (np.array): np-array with shape (n, 2)
+
+            Returns:
+                    pair (tuple): (p, q), the point with the smaller y-coordinate first
+            On equal distances the first pair of itertools.product(points, points) is used.
+    """
+    distance, ref_points = [], []
+    for p, q in itertools.product(points, points):
+        distance.append(length(get_vector(p, q)))
+        ref_points.append((p, q))
+    ref = ref_points[np.nanargmax(distance)]
+    if ref[0][1] > ref[1][1]:
+        ref = (ref[1], ref[0])
+    return ref
+
+
+def convex_hull(points):
+    """
+    Convex hull (monotone chain) without collinear points
+
+            Parameters:
+                    points (np.array): np-array with shape (n, 2)
+
+            Returns:
+                    hull (list): corner points as tuples, counterclockwise
+    """
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    points = sorted(set(map(tuple, np.asarray(points).tolist())))
+    if len(points) < 3:
+        return points
+    lower, upper = [], []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+
+def antipodal_pairs(hull):
+    """
+    Antipodal pairs of a convex polygon (rotating calipers), contains every farthest pair
+
+            Parameters:
+                    hull (list): corner points, counterclockwise (see convex_hull)
+
+            Returns:
+                    pairs (list): index pairs (i, j) of the hull
+    """
+    n = len(hull)
+    if n < 3:
+        return [(0, n - 1)]
+
+    def edge_cross(i, j):
+        # orientation of edge j relative to edge i
+        a, b = hull[i], hull[(i + 1) % n]
+        c, d = hull[j], hull[(j + 1) % n]
+        return (b[0] - a[0]) * (d[1] - c[1]) - (b[1] - a[1]) * (d[0] - c[0])
+
+    pairs = []
+    j = 1
+    for i in range(n):
+        while edge_cross(i, j) > 0:
+            j = (j + 1) % n
+        pairs += [(i, j), ((i + 1) % n, j)]
+        if edge_cross(i, j) == 0:
+            # parallel edges, both corners of edge j are antipodal
+            pairs += [(i, (j + 1) % n), ((i + 1) % n, (j + 1) % n)]
+    return pairs
+
+
+def farthest_pair(points):
+    """
+    Farthest pair of points in O(n log n) (convex hull and rotating calipers),
+    same result as farthest_pair_brute_force
+
+            Parameters:
+                    points (np.array): np-array with shape (n, 2)
+
+            Returns:
+                    pair (tuple): (p, q), the point with the smaller y-coordinate first
+    """
+    points = np.asarray(points)
+    hull = convex_hull(points)
+    pairs = antipodal_pairs(hull)
+    hull = np.array(hull, dtype=points.dtype)
+    candidates = hull[[i for i, _ in pairs]], hull[[j for _, j in pairs]]
+    distances = lengths(candidates[0] - candidates[1])
+    # first occurrence of every point, the brute force keeps the first pair on equal distances
+    first = {}
+    for i, p in enumerate(map(tuple, points.tolist())):
+        first.setdefault(p, i)
+    ref = None
+    for k in np.flatnonzero(distances == distances.max()):
+        i = first[tuple(candidates[0][k].tolist())]
+        j = first[tuple(candidates[1][k].tolist())]
+        ref = min((i, j), (j, i)) if ref is None else min(ref, (i, j), (j, i))
+    ref = (points[ref[0]], points[ref[1]])
+    if ref[0][1] > ref[1][1]:
+        ref = (ref[1], ref[0])
+    return ref
+
+
 def find_ref_points(coords, config):
-    right_ventricel = list(coords.get(config.rv_name_or_nr))
-    left_ventricle = list(coords.get(config.lv_epi_name_or_nr))
-    r_points, l_points = [], []
+    right_ventricel = np.asarray(coords.get(config.rv_name_or_nr))
+    left_ventricle = np.asarray(coords.get(config.lv_epi_name_or_nr))
     min_delta = config.resize_polygon_factor
+    # one search with the largest limit (3 tries, doubled each time) returns the pairs of all tries
+    index_r, index_l, distances = close_point_pairs(
+        right_ventricel, left_ventricle, min_delta * 4
+    )
+    selected = []
     count = 0
-    while len(r_points) < 10:
+    while sum(len(_) for _ in selected) < 10:
         count += 1
         if count == 4:
             coords["sacardialRefPoint"] = None
             return None
-        for p, q in itertools.product(right_ventricel, left_ventricle):
-            l = length(get_vector(p, q))
-            if l < min_delta:
-                r_points.append(p)
-                l_points.append(q)
+        # like before, the pairs of every try are appended (pairs of earlier tries again)
+        selected.append(np.flatnonzero(distances < min_delta))
         min_delta *= 2
+    selected = np.concatenate(selected)
+    r_points = right_ventricel[index_r[selected]]
+    l_points = left_ventricle[index_l[selected]]
 
-    def calc_refpoints(points):
-        distance, ref_points = [], []
-        for p, q in itertools.product(points, points):
-            distance.append(length(get_vector(p, q)))
-            ref_points.append((p, q))
-        ref = ref_points[np.nanargmax(distance)]
-        if ref[0][1] > ref[1][1]:
-            ref = (ref[1], ref[0])
-        return ref
-
-    l_ref = calc_refpoints(l_points)
-    r_ref = calc_refpoints(r_points)
+    l_ref = farthest_pair(l_points)
+    r_ref = farthest_pair(r_points)
     coords["sacardialRefPoint"] = np.array(
         [calc_center_of_2_points(np.array(l_ref[0]), np.array(r_ref[0]))]
     )
@@ -243,29 +425,24 @@ def calc_line_for_EI(roi, angle):
     """
     center = calc_center_of_polygon(roi)
     roi = rotate_points(roi, center, angle, "int")
-    point_dict = order_roi_to_dict(roi)
-    xs = [int(float(key)) for key in point_dict.keys()]
-    max_dist = 0
-    line = None
-    range_ = round((max(xs) - min(xs)) / 15)
-    for i in range(min(xs) + range_, max(xs) - range_ + 1):
-        dists = [
-            point_dict[str(k)][2] if point_dict.get(str(k)) is not None else None
-            for k in range(i - range_, i + range_)
-        ]
-        for _ in range(dists.count(None)):
-            dists.remove(None)
-        if len(dists) > 0:
-            dist = np.array(dists).mean()
-
-            if dist > max_dist:
-                line = (
-                    point_dict[str(i)][:2]
-                    if point_dict.get(str(i)) is not None
-                    else line
-                )
-                max_dist = dist if point_dict.get(str(i)) is not None else max_dist
-    return rotate_points(line, center, -angle)
+    columns, present, y_max, y_min, counts = column_extents(roi)
+    y_max, y_min = np.round(y_max), np.round(y_min)
+    valid = present & (counts >= 2)
+    dists = np.where(valid, y_max - y_min, 0)
+    # mean of the valid columns i - range_ ... i + range_ - 1 by cumulative sums
+    range_ = round((columns[-1] - columns[0]) / 15)
+    i = np.arange(range_, len(columns) - range_)
+    sum_dists = np.r_[0, np.cumsum(dists)]
+    sum_valid = np.r_[0, np.cumsum(valid)]
+    n = sum_valid[i + range_] - sum_valid[i - range_]
+    mean = (sum_dists[i + range_] - sum_dists[i - range_]) / np.maximum(n, 1)
+    # first column with the largest mean, the column itself has to be valid
+    mean = np.where(valid[i] & (n > 0), mean, 0)
+    if len(i) == 0 or mean.max() <= 0:
+        return []
+    k = i[np.argmax(mean)]
+    line = np.array([(columns[k], y_max[k]), (columns[k], y_min[k])])
+    return list(rotate_points(line, center, -angle))
 
 
 @jit(nopython=True)
@@ -336,40 +513,81 @@ def smooth_3D_mask(mask, scaling=2):
     )
 
 
-def mask_to_polygon(mask):
+def trace_contour(mask, offset=(0, 0)):
     """
-    calc polygon of binary mask
+    Traces the outer border of the first object of a binary mask (cv2.findContours, corner points only)
 
     :param mask: np.array as binary mask
+    :param offset: (x, y) added to the points, e.g. the position of a cropped mask in the image
 
-    :return: polygon as numpy array
+    :return: contour points (x, y) as int numpy array of shape (n, 2)
+    """
+    mask = np.asarray(mask, dtype=bool).astype(np.uint8)
+    mask = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    contours = cv2.findContours(
+        mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(-1, -1)
+    )[-2]
+    return contours[0].reshape(-1, 2).astype(int) + np.array(offset, dtype=int)
+
+
+def resample_polygon(polygon, spacing=None, subdivisions=4):
+    """
+    Densifies a closed polygon (vectorized)
+
+    :param polygon: np.array of shape (n, 2)
+    :param spacing: distance between the returned points along the contour; if None, every edge is divided into
+    subdivisions parts of equal length
+    :param subdivisions: number of parts per edge if spacing is None
+
+    :return: densified polygon as float numpy array
     """
-    polygon = list(Mask(mask).polygons().points[0])
+    polygon = np.asarray(polygon, dtype=float)
+    edges = np.roll(polygon, -1, axis=0) - polygon
+    if spacing is None:
+        t = np.arange(subdivisions) / subdivisions
+        polygon = polygon[:, None, :] + t[None, :, None] * edges[:, None, :]
+        return polygon.reshape(-1, 2)
+    arc_length = np.concatenate(
+        [[0], np.cumsum(np.hypot(edges[:, 0], edges[:, 1]))]
+    )
+    number_of_points = max(int(round(arc_length[-1] / spacing)), 1)
+    positions = np.linspace(0, arc_length[-1], number_of_points, endpoint=False)
+    closed = np.vstack([polygon, polygon[:1]])
+    return np.stack(
+        [
+            np.interp(positions, arc_length, closed[:, 0]),
+            np.interp(positions, arc_length, closed[:, 1]),
+        ],
+        axis=1,
+    )
+
 
-    def line_interp(points):
-        inter_p = []
-        for i in range(len(points)):
-            j = 0 if i == len(points) - 1 else i + 1
-            inter_p.append(points[i])
-            inter_p.append(calc_center_of_2_points(points[i], points[j], mode="float"))
-        return inter_p
+def mask_to_polygon(mask, spacing=None, offset=(0, 0)):
+    """
+    calc polygon of binary mask
 
-    polygon = line_interp(line_interp(polygon))
-    return np.array(polygon)
+    :param mask: np.array as binary mask
+    :param spacing: distance between the points of the polygon in pixels; if None, every edge of the traced contour is
+    divided into 4 parts (as the former double midpoint interpolation)
+    :param offset: (x, y) position of the mask in the image (see trace_contour)
+
+    :return: polygon as numpy array
+    """
+    return resample_polygon(trace_contour(mask, offset), spacing)
 
 
 def calc_mask_of_polygon(dcm_file, coord, name, scaling_factor):
     """
     calculation of binary mask from polygon
 
-    :param dcm_file: path to dicom file
+    :param dcm_file: path to dicom file or already parsed DicomSlice
     :param coord: dict with coords
     :param name: name / key for polygon in coord dict
     :param scaling_factor: int
 
     :return: binary numpy array
     """
-    dcm_shape = pydicom.dcmread(dcm_file).pixel_array.shape
+    dcm_shape = as_dicom_slice(dcm_file).shape
     img = Image.new(
         "L", (dcm_shape[1] * scaling_factor, dcm_shape[0] * scaling_factor), 0
     )
@@ -78,6 +78,25 @@ def length(v):
     return np.sqrt(dotproduct(v / scale, v / scale)) * scale
 
 
+def lengths(vectors):
+    """
+    Calculates the lengths of many vectors at once, with the same arithmetic as length
+
+            Parameters:
+                    vectors (np.array): np-array with shape (m, n)
+
+            Returns:
+                    lengths (np.array): np-array with shape (m,)
+    """
+    vectors = np.asarray(vectors)
+    scale = np.abs(vectors).sum(axis=1)
+    result = np.zeros(len(vectors))
+    nonzero = scale != 0
+    normed = vectors[nonzero] / scale[nonzero, None]
+    result[nonzero] = np.sqrt((normed * normed).sum(axis=1)) * scale[nonzero]
+    return result
+
+
 @jit(nopython=True)
 def calc_angle(v1, v2):
     """
@@ -167,22 +186,38 @@ def rotate_points(points, origin, angle, mode="int"):
     2D point transformation from a set of points around a clockwise origin.
 
             Parameters:
-                    points (list): list of points (each point is an np.array)
+                    points (np.array): np-array with shape (N, 2) or list of points (each point is an np.array)
                     origin (np.array): point around which the other points are rotated
                     angle (float): angle in degrees around which the points are rotated
                     mode (str): int or float - Specifies if points should be rotated to whole pixels only or if there should be subpixels
 
             Returns:
-                    dcm_img (Pillow Image): dcm_image as RGB image
+                    points (np.array): np-array with shape (N, 2) with the rotated points (like rotate_point), int in
+                    mode int
     """
-    new_point_params = []
     if points is None:
-        return new_point_params
-    for point in points:
-        if point is None:
-            continue
-        new_point_params.append(np.array(rotate_point(origin, point, angle, mode)))
-    return new_point_params
+        return np.zeros((0, 2))
+    if not isinstance(points, np.ndarray):
+        points = [point for point in points if point is not None]
+    offsets = np.asarray(points, dtype=float).reshape(-1, 2) - np.asarray(
+        origin, dtype=float
+    )
+    angle = angle * math.pi / 180
+    rotation = np.array(
+        [
+            [math.cos(angle), -math.sin(angle)],
+            [math.sin(angle), math.cos(angle)],
+        ]
+    )
+    # same order of operations as rotate_point: origin + cos * dx - sin * dy
+    new_points = (
+        np.asarray(origin, dtype=float)
+        + rotation[:, 0] * offsets[:, :1]
+        + rotation[:, 1] * offsets[:, 1:]
+    )
+    if mode == "int":
+        return np.round(new_points).astype(int)
+    return new_points
 
 
 @jit(nopython=True)
@@ -241,52 +276,20 @@ def find_distance_with_angles_and_fixed_point(
                     (point on contour, reference point)
     """
     D = {str(angle): None for angle in angles}
-    for angle in angles:
-        points_rot = [rotate_point(fixed_point, point, -angle) for point in points]
-        if angle >= 0:
-            points_rot = [
-                point_rot if point_rot[1] > fixed_point[1] else np.array([-100, -100])
-                for point_rot in points_rot
-            ]
-        else:
-            points_rot = [
-                point_rot if point_rot[1] < fixed_point[1] else np.array([-100, -100])
-                for point_rot in points_rot
-            ]
-        delta_x = [abs(p[0] - fixed_point[0]) for p in points_rot]
-        D[str(angle)] = [np.array(points[np.argmin(delta_x)]), np.array(fixed_point)]
+    if len(angles) == 0 or len(points) == 0:
+        return D
+    ox, oy = fixed_point
+    # offsets to the reference point once, all angles (rows) are rotated at once like rotate_point (mode int)
+    offsets = np.asarray(points, dtype=float) - np.array([ox, oy], dtype=float)
+    radians = [-angle * math.pi / 180 for angle in angles]
+    cos = np.array([math.cos(angle) for angle in radians])[:, None]
+    sin = np.array([math.sin(angle) for angle in radians])[:, None]
+    x_rot = np.round(ox + cos * offsets[:, 0] - sin * offsets[:, 1])
+    y_rot = np.round(oy + sin * offsets[:, 0] + cos * offsets[:, 1])
+    # only points above (angle >= 0) or below the reference point, the others are moved to (-100, -100)
+    upper = np.array([angle >= 0 for angle in angles])[:, None]
+    valid = np.where(upper, y_rot > oy, y_rot < oy)
+    delta_x = np.where(valid, np.abs(x_rot - ox), abs(-100 - ox))
+    for angle, i in zip(angles, np.argmin(delta_x, axis=1)):
+        D[str(angle)] = [np.array(points[i]), np.array(fixed_point)]
     return D
-
-
-def clean_points(points, key, mode="int"):
-    """
-    If there are multiple points with the same x-coordinate, all points that do not have the longest distance are removed.
-
-           Parameters:
-                   points (list): contour \ polygon as a list with points as np.array
-                   key (str): x-coordinate
-                   mode (str): coordinates of the reference point (x,y)
-
-           Returns:
-                   p1 (np.array): coordinates point 1
-                   p2 (np.array): Coordinates point 2
-                   length (float): Length between the two points
-    """
-    count = 0
-    for p in points:
-        if p is None:
-            count += 1
-    for _ in range(count):
-        points.remove(None)
-    if len(points) < 2:
-        return None
-    idx_min = np.argmax(np.array(points)[:, 1])
-    idx_max = np.argmin(np.array(points)[:, 1])
-    p1 = np.array(points[idx_min])
-    p2 = np.array(points[idx_max])
-    p1[0] = float(key)
-    p2[0] = float(key)
-    if mode == "int":
-        p1 = p1.round().astype("int16")
-        p2 = p2.round().astype("int16")
-    return p1, p2, length(get_vector(p1, p2))
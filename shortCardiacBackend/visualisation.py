@@ -233,10 +233,9 @@ def plot_img(
         for i, c in enumerate(coords):
             if c is None:
                 continue
-            c = tuple([(c1, c2) for c1, c2 in c])
             if not img_cf["angle_correction"]:
                 c = rotate_points(c, center_img, -angle)
-                c = [tuple(_) for _ in c]
+            c = [tuple(_) for _ in c]
             try:
                 color_a = colors[i]
                 color_a = (color_a[0], color_a[1], color_a[2], 250)
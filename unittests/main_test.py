@@ -2,6 +2,15 @@ from test_transformContours import *
 from test_SIConvertion import *
 from test_supportFunction import *
 from test_transformPointsAndVectors import *
+from test_DicomSlice import *
+from test_DicomIndex import *
+from test_CineStack import *
+from test_DicomArchive import *
+from test_DicomQuery import *
+from test_CoordReader import *
+from test_CoordCVI42 import *
+from test_CoordStore import *
+from test_main import *
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pydicom
+
+from shortCardiacBackend.CineStack import *
+
+TEST_DCM = os.path.join(
+    os.path.dirname(__file__), "..", "TestData", "DICOM", "test_slice.dcm"
+)
+
+
+class TestCineStack(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.files, self.positions = [], {}
+        ds = pydicom.dcmread(TEST_DCM)
+        for i, (slice_location, trigger_time) in enumerate(
+            [
+                (20.0, 40.0),
+                (10.0, 40.0),
+                (20.0, 0.0),
+                (10.0, 0.0),
+                (0.0, 0.0),
+                (0.0, 41.5),
+            ]
+        ):
+            ds.SOPInstanceUID = f"1.2.3.{i}"
+            ds.SliceLocation = slice_location
+            ds.TriggerTime = trigger_time
+            ds.PixelData = (ds.pixel_array * 0 + i).tobytes()
+            file = os.path.join(self.folder, f"{i}.dcm")
+            ds.save_as(file)
+            self.files.append(file)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_stack(self):
+        stack = CineStack(self.files)
+        self.assertEqual(stack.shape, (3, 2, 200, 200))
+        self.assertEqual(stack.slice_locations, [0.0, 10.0, 20.0])
+        # slightly different trigger times per slice do not add phases
+        self.assertEqual(stack.trigger_times, [[0.0, 41.5], [0.0, 40.0], [0.0, 40.0]])
+        self.assertEqual(stack.lookup["1.2.3.0"], (2, 1))
+        self.assertEqual(stack.lookup["1.2.3.4"], (0, 0))
+        self.assertEqual(stack.lookup["1.2.3.5"], (0, 1))
+        # the 4D array is read once
+        self.assertIs(stack.pixel_array, stack.pixel_array)
+        for i, file in enumerate(self.files):
+            dicom = stack.files[file]
+            self.assertIs(dicom, stack[f"1.2.3.{i}"])
+            self.assertTrue((dicom.pixel_array == i).all())
+            self.assertTrue(np.shares_memory(dicom.pixel_array, stack.pixel_array))
+
+    def test_different_number_of_phases(self):
+        with self.assertRaises(ValueError):
+            CineStack(self.files[:5])
+
+    def test_series_of_DICOMs(self):
+        self.assertEqual(
+            series_of_DICOMs(self.files[:2]),
+            [pydicom.dcmread(TEST_DCM).SeriesInstanceUID] * 2,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
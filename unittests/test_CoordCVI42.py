@@ -0,0 +1,129 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from shortCardiacBackend.CoordCVI42 import *
+
+HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Hash:root xmlns:Hash="http://www.circlecvi.com/cvi42/Workspace/Hash/" '
+    'xmlns:List="http://www.circlecvi.com/cvi42/Workspace/List/" '
+    'xmlns:Point="http://www.circlecvi.com/cvi42/Workspace/Point/">\n'
+)
+
+
+def contour_xml(name, points, sub):
+    items = "".join(
+        f'<List:item List:type="point"><Point:x>{x}</Point:x><Point:y>{y}</Point:y></List:item>'
+        for x, y in points
+    )
+    return (
+        f'<Hash:item Hash:key="{name}" Hash:type="hash">'
+        f'<Hash:item Hash:key="Points" Hash:type="list">{items}</Hash:item>'
+        f'<Hash:item Hash:key="SubpixelResolution" Hash:type="int">{sub}</Hash:item>'
+        f"</Hash:item>"
+    )
+
+
+def image_state_xml(uid, contours):
+    return (
+        f'<Hash:item Hash:key="{uid}" Hash:type="hash">'
+        f'<Hash:item Hash:key="Contours" Hash:type="hash">{"".join(contours)}</Hash:item>'
+        f"</Hash:item>"
+    )
+
+
+class TestCoordCVI42(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cvi42_file = os.path.join(self.folder, "workspace.cvi42wsx")
+        image_states = [
+            image_state_xml(
+                "1.2.3.1",
+                [
+                    contour_xml("saendocardialContour", [(4, 8), (12.5, 16)], 4),
+                    contour_xml("sarvendocardialContour", [(1.25, 2.5)], 1),
+                ],
+            ),
+            image_state_xml("1.2.3.2", []),
+            image_state_xml(
+                "1.2.3.3", [contour_xml("saepicardialContour", [(16, 24)], 8)]
+            ),
+        ]
+        # deeply nested nodes must not hit the recursion limit
+        deep = '<Hash:item Hash:key="x">' * 5000 + "</Hash:item>" * 5000
+        with open(self.cvi42_file, "w") as f:
+            f.write(
+                HEADER
+                + deep
+                + '<Hash:item Hash:key="ImageStates" Hash:type="hash">'
+                + "".join(image_states)
+                + "</Hash:item></Hash:root>"
+            )
+
+    def tearDown(self):
+        for file in os.listdir(self.folder):
+            os.remove(os.path.join(self.folder, file))
+        os.rmdir(self.folder)
+
+    def test_iterContours(self):
+        records = list(iterContours(self.cvi42_file))
+        self.assertEqual(
+            [(uid, name) for uid, name, _ in records],
+            [
+                ("1.2.3.1", "saendocardialContour"),
+                ("1.2.3.1", "sarvendocardialContour"),
+                ("1.2.3.3", "saepicardialContour"),
+            ],
+        )
+        np.testing.assert_array_equal(records[0][2], [[1, 2], [3.125, 4]])
+        np.testing.assert_array_equal(records[1][2], [[1.25, 2.5]])
+        np.testing.assert_array_equal(records[2][2], [[2, 3]])
+
+    def test_parsePoints(self):
+        node = ET.fromstring(
+            HEADER.split("\n", 1)[1]
+            + '<Hash:item Hash:key="Points">'
+            + "".join(
+                f"<List:item><Point:x> {x}\n</Point:x><Point:y>{y}</Point:y></List:item>"
+                for x, y in [(1.5, 2), (0.1, 1e-7), (800, 3.25)]
+            )
+            + "</Hash:item></Hash:root>"
+        )[0]
+        points = parsePoints(node)
+        self.assertEqual(points.shape, (3, 2))
+        self.assertEqual(points.tolist(), [[1.5, 2], [0.1, 1e-7], [800, 3.25]])
+
+    def test_iterContours_uids(self):
+        skipped_uids = set()
+        records = list(
+            iterContours(self.cvi42_file, ["1.2.3.3", "9.9"], skipped_uids)
+        )
+        self.assertEqual(
+            [(uid, name) for uid, name, _ in records],
+            [("1.2.3.3", "saepicardialContour")],
+        )
+        np.testing.assert_array_equal(records[0][2], [[2, 3]])
+        self.assertEqual(skipped_uids, {"1.2.3.1", "1.2.3.2"})
+
+    def test_parseFile(self):
+        coord_file = os.path.join(self.folder, "coords.pkl")
+        parseFile(self.cvi42_file, coord_file)
+        with open(coord_file, "rb") as f:
+            coords = pickle.load(f)
+        self.assertEqual(list(coords.keys()), ["1.2.3.1", "1.2.3.3"])
+        self.assertEqual(
+            list(coords["1.2.3.1"].keys()),
+            ["saendocardialContour", "sarvendocardialContour"],
+        )
+        np.testing.assert_array_equal(coords["1.2.3.3"]["saepicardialContour"], [[2, 3]])
+        self.assertEqual(
+            list(parseWorkspace(self.cvi42_file, ["1.2.3.3"]).keys()), ["1.2.3.3"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
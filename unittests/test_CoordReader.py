@@ -0,0 +1,160 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from shortCardiacBackend.Config import RunConfiguration
+from shortCardiacBackend.CoordReader import *
+from shortCardiacBackend.loadAndSave import load_DICOMs
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), "..", "TestData")
+
+
+class TestCoordReader(unittest.TestCase):
+    def setUp(self):
+        self.config = RunConfiguration()
+        self.config.rv_name_or_nr = "1"
+        self.config.lv_epi_name_or_nr = "2"
+        self.config.lv_endo_name_or_nr = "3"
+
+    def assertCoordsEqual(self, coords, expected):
+        self.assertEqual(list(coords.keys()), list(expected.keys()))
+        for ui in expected:
+            self.assertEqual(list(coords[ui].keys()), list(expected[ui].keys()))
+            for roi in expected[ui]:
+                np.testing.assert_array_equal(coords[ui][roi], expected[ui][roi])
+
+    def prepare_nii(self):
+        dcm_files, uis = load_DICOMs(os.path.join(TEST_DATA, "DICOM"), index_file=None)
+        with tempfile.TemporaryDirectory() as folder:
+            coord_file = os.path.join(folder, "mask.pkl")
+            coord_reader = CoordReader(self.config)
+            coord_reader.preparation_nii(
+                os.path.join(TEST_DATA, "mask.nii.gz"), dcm_files, coord_file, uis
+            )
+            return coord_reader.load_coordinates(coord_file)
+
+    def test_preparation_nii(self):
+        with open(os.path.join(TEST_DATA, "mask.pkl"), "rb") as f:
+            expected = pickle.load(f)
+        self.config.worker = 0
+        self.assertCoordsEqual(self.prepare_nii(), expected)
+        self.config.worker = 2
+        self.assertCoordsEqual(self.prepare_nii(), expected)
+
+    def test_nifti_slices(self):
+        nii_file = os.path.join(TEST_DATA, "mask.nii.gz")
+        volume = nib.load(nii_file).get_fdata()[:, :, ::-1].transpose(1, 0, 2)
+        slices = NiftiSlices(nii_file)
+        self.assertEqual(len(slices), volume.shape[2])
+        for i in range(len(slices)):
+            np.testing.assert_array_equal(slices[i], volume[:, :, i])
+        self.assertEqual(slices[0].dtype, nib.load(nii_file).get_data_dtype())
+        with self.assertRaises(IndexError):
+            slices[len(slices)]
+        self.assertIsNone(pickle.loads(pickle.dumps(slices))._image)
+
+    def test_nifti_slices_gzip(self):
+        volume = np.random.default_rng(0).integers(0, 4, (32, 32, 20)).astype("uint8")
+        with tempfile.TemporaryDirectory() as folder:
+            nii_file = os.path.join(folder, "mask.nii.gz")
+            nib.save(nib.Nifti1Image(volume, np.eye(4)), nii_file)
+            slices = NiftiSlices(nii_file)
+            with mock.patch(
+                "nibabel.openers.ImageOpener", wraps=nib.openers.ImageOpener
+            ) as opener:
+                for i in range(len(slices) - 1, -1, -1):
+                    np.testing.assert_array_equal(
+                        slices[i], volume[:, :, len(slices) - 1 - i].T
+                    )
+            # one open file for all slices
+            self.assertEqual(opener.call_count, 1)
+            del slices
+
+    def test_prepare_coordinates(self):
+        dcm_files, uis = load_DICOMs(os.path.join(TEST_DATA, "DICOM"), index_file=None)
+        with open(os.path.join(TEST_DATA, "mask.pkl"), "rb") as f:
+            expected = pickle.load(f)
+        with tempfile.TemporaryDirectory() as folder:
+            nii_file = os.path.join(folder, "mask.nii.gz")
+            shutil.copy(os.path.join(TEST_DATA, "mask.nii.gz"), nii_file)
+            coord_reader = CoordReader(self.config)
+            with mock.patch.object(
+                coord_reader,
+                "coordinates_of_nii",
+                wraps=coord_reader.coordinates_of_nii,
+            ) as preparation:
+                store_file = coord_reader.prepare_coordinates(
+                    nii_file, dcm_files, uis, mode="nii"
+                )
+                self.assertCoordsEqual(CoordStore(store_file), expected)
+                # the store is the only cache file
+                self.assertEqual(
+                    sorted(os.listdir(folder)),
+                    sorted(["mask.nii.gz", os.path.basename(store_file)]),
+                )
+                # rerun with the same input: cached
+                self.assertEqual(
+                    coord_reader.prepare_coordinates(nii_file, dcm_files, uis, "nii"),
+                    store_file,
+                )
+                self.assertEqual(preparation.call_count, 1)
+                # changed label ids, file and preparation version create a new store, the old one is removed
+                stores = [store_file]
+                self.config.lv_endo_name_or_nr = "2"
+                stores.append(
+                    coord_reader.prepare_coordinates(nii_file, dcm_files, uis, "nii")
+                )
+                self.config.lv_endo_name_or_nr = "3"
+                with open(nii_file, "ab") as f:
+                    f.write(b"\0")
+                stores.append(
+                    coord_reader.prepare_coordinates(nii_file, dcm_files, uis, "nii")
+                )
+                with mock.patch(
+                    "shortCardiacBackend.CoordReader.PREPARATION_VERSION",
+                    PREPARATION_VERSION + 1,
+                ):
+                    stores.append(
+                        coord_reader.prepare_coordinates(
+                            nii_file, dcm_files, uis, "nii"
+                        )
+                    )
+                self.assertEqual(preparation.call_count, 4)
+                self.assertEqual(len(set(stores)), 4)
+                self.assertEqual(
+                    sorted(os.listdir(folder)),
+                    sorted(["mask.nii.gz", os.path.basename(stores[-1])]),
+                )
+
+    def test_split_labels(self):
+        slice_mask = np.array([[0, 1, 2], [3, 4, -1]])
+        channels = split_labels(slice_mask, ["1", "2", "3"])
+        self.assertEqual(channels.shape, (2, 3, 3))
+        for channel, id in enumerate([1, 2, 3]):
+            np.testing.assert_array_equal(
+                channels[:, :, channel], np.where(slice_mask == id, 255, 0)
+            )
+        np.testing.assert_array_equal(
+            split_labels(np.array([[1.0, 1.5, 3.0]]), [1, 3])[0],
+            [[255, 0], [0, 0], [0, 255]],
+        )
+
+    def test_polygons_of_slice(self):
+        slice_mask = np.zeros((64, 64), dtype=np.uint8)
+        slice_mask[10:30, 20:40] = 2
+        slice_mask[15:25, 25:35] = 3
+        polygons = polygons_of_slice(slice_mask, ["1", "2", "3"])
+        # label 1 is missing in the slice
+        self.assertEqual(list(polygons.keys()), ["2", "3"])
+        for id, (y0, y1, x0, x1) in (("2", (10, 30, 20, 40)), ("3", (15, 25, 25, 35))):
+            self.assertTrue(np.allclose(polygons[id].min(axis=0), (x0, y0), atol=1))
+            self.assertTrue(np.allclose(polygons[id].max(axis=0), (x1, y1), atol=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
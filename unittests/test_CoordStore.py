@@ -0,0 +1,74 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from shortCardiacBackend.CoordStore import *
+
+TEST_PKL = os.path.join(os.path.dirname(__file__), "..", "TestData", "mask.pkl")
+
+
+class TestCoordStore(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.coords = {
+            "1.2.3.1": {"1": np.random.rand(40, 2), "2": np.random.rand(7, 2)},
+            "1.2.3.2": {},
+            "1.2.3.3": {"3": np.zeros((0, 2)), "1": np.random.rand(1, 2)},
+            "1.2.3.4": {"2": np.array([]), "3": np.zeros((0, 2))},
+        }
+        self.store_file = save_coord_store(
+            self.coords, os.path.join(self.folder.name, "coords.npz")
+        )
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def assertCoordsEqual(self, coords, expected):
+        self.assertEqual(list(coords.keys()), list(expected.keys()))
+        for ui in expected:
+            self.assertEqual(list(coords[ui].keys()), list(expected[ui].keys()))
+            for roi in expected[ui]:
+                self.assertEqual(coords[ui][roi].shape, expected[ui][roi].shape)
+                np.testing.assert_array_equal(coords[ui][roi], expected[ui][roi])
+
+    def test_store(self):
+        store = CoordStore(self.store_file)
+        self.assertIsInstance(store.points, np.memmap)
+        self.assertCoordsEqual(store, self.coords)
+        self.assertIn("1.2.3.2", store)
+        self.assertNotIn("9.9", store)
+        self.assertIsNone(store.get("9.9"))
+        # the contours are writable copies
+        store["1.2.3.1"]["1"] *= 2
+        self.assertCoordsEqual(store, self.coords)
+
+    def test_pickle(self):
+        store = pickle.loads(pickle.dumps(CoordStore(self.store_file)))
+        self.assertIsInstance(store.points, np.memmap)
+        self.assertCoordsEqual(store, self.coords)
+
+    def test_convert_pkl_to_store(self):
+        store_file = convert_pkl_to_store(
+            TEST_PKL, os.path.join(self.folder.name, "mask.npz")
+        )
+        with open(TEST_PKL, "rb") as f:
+            self.assertCoordsEqual(CoordStore(store_file), pickle.load(f))
+        # by default cached in the temp directory, not next to the pickle file
+        pkl_file = os.path.join(self.folder.name, "mask.pkl")
+        with open(pkl_file, "wb") as f:
+            pickle.dump(self.coords, f)
+        store_file = convert_pkl_to_store(pkl_file)
+        self.assertEqual(os.path.dirname(store_file), tempfile.gettempdir())
+        self.assertEqual(
+            sorted(os.listdir(self.folder.name)), ["coords.npz", "mask.npz", "mask.pkl"]
+        )
+        self.assertEqual(convert_pkl_to_store(pkl_file), store_file)
+        self.assertCoordsEqual(CoordStore(store_file), self.coords)
+        os.remove(store_file)
+
+
+if __name__ == "__main__":
+    unittest.main()
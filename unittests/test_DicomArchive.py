@@ -0,0 +1,123 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+import numpy as np
+import pydicom
+
+from shortCardiacBackend.DicomArchive import *
+from shortCardiacBackend.DicomArchive import _tar_stream
+from shortCardiacBackend.DicomSlice import DicomSlice
+from shortCardiacBackend.loadAndSave import load_DICOMs
+from shortCardiacBackend.supportFunction import walk_files, read_dicom_header
+
+TEST_DCM = os.path.join(
+    os.path.dirname(__file__), "..", "TestData", "DICOM", "test_slice.dcm"
+)
+
+
+class TestDicomArchive(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.zip_file = os.path.join(self.folder, "study.zip")
+        with zipfile.ZipFile(self.zip_file, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(TEST_DCM, "series/slice.dcm")
+            archive.writestr("series/notes.txt", "no dicom")
+        self.tar_file = os.path.join(self.folder, "study.tar.gz")
+        with tarfile.open(self.tar_file, "w:gz") as archive:
+            archive.add(TEST_DCM, "slice.dcm")
+
+    def tearDown(self):
+        tar_headers.cache_clear()
+        _tar_stream.cache_clear()
+        shutil.rmtree(self.folder)
+
+    def test_split_archive_path(self):
+        member = os.path.join(self.zip_file, "series", "slice.dcm")
+        self.assertEqual(
+            split_archive_path(member), (self.zip_file, "series/slice.dcm")
+        )
+        self.assertIsNone(split_archive_path(self.zip_file))
+        self.assertIsNone(split_archive_path(TEST_DCM))
+
+    def test_walk_files(self):
+        files = list(walk_files(self.folder))
+        self.assertIn(os.path.join(self.zip_file, "series", "slice.dcm"), files)
+        self.assertIn(os.path.join(self.zip_file, "series", "notes.txt"), files)
+        self.assertIn(os.path.join(self.tar_file, "slice.dcm"), files)
+        self.assertNotIn(self.zip_file, files)
+        self.assertEqual(
+            list(walk_files(self.zip_file, fast_mode=True)),
+            [os.path.join(self.zip_file, "series", "slice.dcm")],
+        )
+
+    def test_load_DICOMs(self):
+        uid = pydicom.dcmread(TEST_DCM).SOPInstanceUID
+        dcms, uis = load_DICOMs(self.folder)
+        self.assertEqual(len(dcms), 2)
+        self.assertEqual(uis, [uid, uid])
+        dcms_indexed, uis_indexed = load_DICOMs(
+            self.folder, index_file="index.sqlite", worker=2
+        )
+        self.assertEqual((dcms_indexed, uis_indexed), (dcms, uis))
+
+    def test_read_member(self):
+        ds = pydicom.dcmread(TEST_DCM)
+        for member in (
+            os.path.join(self.zip_file, "series", "slice.dcm"),
+            os.path.join(self.tar_file, "slice.dcm"),
+        ):
+            self.assertEqual(
+                read_dicom_header(member, ["SOPInstanceUID"]).SOPInstanceUID,
+                ds.SOPInstanceUID,
+            )
+            dicom = DicomSlice(member)
+            self.assertIsNone(dicom.memmap_pixel_data())
+            np.testing.assert_array_equal(dicom.pixel_array, ds.pixel_array)
+        self.assertIsNone(
+            read_dicom_header(os.path.join(self.zip_file, "series", "notes.txt"))
+        )
+
+    def test_compressed_tar_single_pass(self):
+        tar_file = os.path.join(self.folder, "series.tar.gz")
+        with tarfile.open(tar_file, "w:gz") as archive:
+            for i in range(10):
+                archive.add(TEST_DCM, f"series/{i}.dcm")
+        ds = pydicom.dcmread(TEST_DCM)
+        with mock.patch("tarfile.open", wraps=tarfile.open) as tar_open:
+            members = archive_members(tar_file)
+            self.assertEqual(members, [f"series/{i}.dcm" for i in range(10)])
+            for member in members:
+                path = os.path.join(tar_file, *member.split("/"))
+                self.assertEqual(
+                    file_size_and_mtime(path)[0], os.path.getsize(TEST_DCM)
+                )
+                self.assertEqual(
+                    read_dicom_header(path).SOPInstanceUID, ds.SOPInstanceUID
+                )
+        # one pass for the headers and one stream for the members
+        self.assertEqual(tar_open.call_count, 2)
+        # members before the current position restart the stream
+        with open(TEST_DCM, "rb") as f:
+            content = f.read()
+        stream = TarStream(tar_file, keep=2)
+        for member in reversed(members):
+            self.assertEqual(stream.read(member), content)
+
+    def test_output_path(self):
+        member = os.path.join(self.zip_file, "series", "slice.dcm")
+        png = output_path(member, ".png")
+        self.assertEqual(
+            png, os.path.join(self.folder, "study", "series", "slice.png")
+        )
+        self.assertTrue(os.path.isdir(os.path.dirname(png)))
+        self.assertEqual(output_path(TEST_DCM, ".png"), TEST_DCM.replace(".dcm", ".png"))
+        self.assertEqual(output_folder(self.folder), self.folder)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from importlib import import_module
+from unittest import mock
+
+import pydicom
+
+from shortCardiacBackend.DicomIndex import *
+
+DicomIndexModule = import_module("shortCardiacBackend.DicomIndex")
+
+TEST_DCM = os.path.join(
+    os.path.dirname(__file__), "..", "TestData", "DICOM", "test_slice.dcm"
+)
+
+
+class TestDicomIndex(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.folder, "sub"))
+        shutil.copy(TEST_DCM, os.path.join(self.folder, "sub", "slice.dcm"))
+        with open(os.path.join(self.folder, "notes.txt"), "w") as f:
+            f.write("no dicom")
+        self.index_file = os.path.join(self.folder, "index.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_update(self):
+        ds = pydicom.dcmread(TEST_DCM)
+        with DicomIndex(self.index_file) as index:
+            rows = index.update(self.folder)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["file"], os.path.join(self.folder, "sub", "slice.dcm"))
+        self.assertEqual(rows[0]["sop_instance_uid"], ds.SOPInstanceUID)
+        self.assertEqual(rows[0]["rows"], ds.Rows)
+        self.assertEqual(rows[0]["pixel_spacing_x"], float(ds.PixelSpacing[0]))
+        self.assertIsNone(rows[0]["trigger_time"])
+
+    def test_unreadable_file(self):
+        shutil.copy(TEST_DCM, os.path.join(self.folder, "broken.dcm"))
+        read_dicom_header = DicomIndexModule.read_dicom_header
+
+        def read_header(file, **kwargs):
+            if file.endswith("broken.dcm"):
+                raise EOFError("truncated file")
+            return read_dicom_header(file, **kwargs)
+
+        with mock.patch.object(DicomIndexModule, "read_dicom_header", read_header):
+            with DicomIndex(self.index_file) as index:
+                rows = index.update(self.folder)
+        self.assertEqual(
+            [row["file"] for row in rows], [os.path.join(self.folder, "sub", "slice.dcm")]
+        )
+
+    def test_incremental_update(self):
+        with DicomIndex(self.index_file) as index:
+            index.update(self.folder)
+        with mock.patch.object(
+            DicomIndexModule, "read_header_row", wraps=read_header_row
+        ) as read:
+            with DicomIndex(self.index_file) as index:
+                rows = index.update(self.folder)
+            self.assertEqual(read.call_count, 0)
+            self.assertEqual(len(rows), 1)
+
+            os.remove(os.path.join(self.folder, "sub", "slice.dcm"))
+            shutil.copy(TEST_DCM, os.path.join(self.folder, "slice_2.dcm"))
+            with DicomIndex(self.index_file) as index:
+                rows = index.update(self.folder)
+                self.assertIsNone(
+                    index.get(os.path.join(self.folder, "sub", "slice.dcm"))
+                )
+            self.assertEqual(read.call_count, 1)
+            self.assertEqual(rows[0]["file"], os.path.join(self.folder, "slice_2.dcm"))
+
+    def test_rebuild_outdated_index(self):
+        connection = sqlite3.connect(self.index_file)
+        connection.execute("CREATE TABLE dicoms (path TEXT PRIMARY KEY, size INTEGER)")
+        connection.commit()
+        connection.close()
+        with DicomIndex(self.index_file) as index:
+            rows = index.update(self.folder)
+        self.assertEqual(rows[0]["modality"], "MR")
+
+
+if __name__ == "__main__":
+    unittest.main()
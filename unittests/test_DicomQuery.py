@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pydicom
+
+from shortCardiacBackend.DicomQuery import *
+from shortCardiacBackend.loadAndSave import load_DICOMs
+
+TEST_DCM = os.path.join(
+    os.path.dirname(__file__), "..", "TestData", "DICOM", "test_slice.dcm"
+)
+
+
+class TestDicomQuery(unittest.TestCase):
+    def setUp(self):
+        # 3 slice locations x 2 trigger times of a cine series
+        self.folder = tempfile.mkdtemp()
+        for i, slice_location in enumerate([-30.0, -10.0, 10.0]):
+            for j, trigger_time in enumerate([0.0, 400.0]):
+                ds = pydicom.dcmread(TEST_DCM)
+                ds.SOPInstanceUID = f"1.2.3.{i}.{j}"
+                ds.SliceLocation = slice_location
+                ds.TriggerTime = trigger_time
+                ds.SeriesDescription = "SA cine"
+                ds.save_as(os.path.join(self.folder, f"slice_{i}_{j}.dcm"))
+        self.dcm_files, self.uis = load_DICOMs(self.folder, index_file=None)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_empty_query(self):
+        self.assertTrue(DicomQuery().is_empty())
+        self.assertEqual(
+            DicomQuery().filter(self.dcm_files, self.uis), (self.dcm_files, self.uis)
+        )
+
+    def test_filter(self):
+        query = DicomQuery(slice_location=(-20, 0), trigger_time=(None, 10))
+        dcm_files, uis = query.filter(self.dcm_files, self.uis)
+        self.assertEqual(uis, ["1.2.3.1.0"])
+        self.assertEqual(dcm_files, [os.path.join(self.folder, "slice_1_0.dcm")])
+
+        _, uis = DicomQuery(series_description="sa CINE", modality="mr").filter(
+            self.dcm_files, self.uis
+        )
+        self.assertEqual(len(uis), 6)
+        _, uis = DicomQuery(series_description="LAX").filter(self.dcm_files, self.uis)
+        self.assertEqual(uis, [])
+        _, uis = DicomQuery(uids=["1.2.3.2.1", "1.2.3.0.0"]).filter(
+            self.dcm_files, self.uis
+        )
+        self.assertEqual(sorted(uis), ["1.2.3.0.0", "1.2.3.2.1"])
+        # more uids than SQL parameters are allowed
+        uids = [f"9.9.{i}" for i in range(250000)] + ["1.2.3.1.1"]
+        _, uis = DicomQuery(uids=uids).filter(self.dcm_files, self.uis)
+        self.assertEqual(uis, ["1.2.3.1.1"])
+
+    def test_filter_with_index(self):
+        dcm_files, uis = load_DICOMs(self.folder, index_file="index.sqlite")
+        query = DicomQuery(slice_location=(-20, None), trigger_time=(300, 500))
+        index_file = os.path.join(self.folder, "index.sqlite")
+        self.assertEqual(
+            query.filter(dcm_files, uis, index_file),
+            query.filter(self.dcm_files, self.uis),
+        )
+        self.assertEqual(
+            sorted(query.filter(dcm_files, uis, index_file)[1]),
+            ["1.2.3.1.1", "1.2.3.2.1"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pydicom
+
+from shortCardiacBackend.DicomSlice import *
+
+TEST_DCM = os.path.join(
+    os.path.dirname(__file__), "..", "TestData", "DICOM", "test_slice.dcm"
+)
+
+
+class TestDicomSlice(unittest.TestCase):
+    def test_header_and_pixels(self):
+        dicom = DicomSlice(TEST_DCM)
+        ds = pydicom.dcmread(TEST_DCM)
+        self.assertEqual(dicom.uid, ds.SOPInstanceUID)
+        self.assertEqual(dicom.shape, ds.pixel_array.shape)
+        self.assertEqual(
+            dicom.pixel_spacing,
+            {"x": float(ds.PixelSpacing[0]), "y": float(ds.PixelSpacing[1])},
+        )
+
+    def test_lazy_pixel_data(self):
+        dicom = DicomSlice(TEST_DCM)
+        self.assertIsNone(dicom._pixel_array)
+        self.assertEqual(dicom.shape, (200, 200))
+        self.assertIsNone(dicom._pixel_array)
+        self.assertTrue(
+            (dicom.pixel_array == pydicom.dcmread(TEST_DCM).pixel_array).all()
+        )
+
+    def write_copy(self, pixel_array, bits_stored):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        ds = pydicom.dcmread(TEST_DCM)
+        ds.BitsStored = bits_stored
+        ds.HighBit = bits_stored - 1
+        ds.PixelData = pixel_array.astype("<u2").tobytes()
+        dcm_file = os.path.join(folder, "slice.dcm")
+        ds.save_as(dcm_file)
+        return dcm_file
+
+    def test_memmap_pixel_data(self):
+        dcm_file = self.write_copy(pydicom.dcmread(TEST_DCM).pixel_array, 16)
+        dicom = DicomSlice(dcm_file)
+        pixel_array = dicom.memmap_pixel_data()
+        self.assertIsInstance(pixel_array, np.memmap)
+        self.assertFalse(pixel_array.flags.writeable)
+        expected = pydicom.dcmread(dcm_file).pixel_array
+        self.assertEqual(pixel_array.dtype, expected.dtype)
+        self.assertTrue((pixel_array == expected).all())
+        self.assertIs(dicom.pixel_array, dicom.pixel_array)
+
+    def test_memmap_pixel_data_unused_high_bits(self):
+        # 12 bits stored in 16 bits, the high bits are set (e.g. by overlays)
+        pixel_array = pydicom.dcmread(TEST_DCM).pixel_array | 0xF000
+        dcm_file = self.write_copy(pixel_array, 12)
+        expected = pydicom.dcmread(dcm_file).pixel_array
+        self.assertLess(expected.max(), 4096)
+        pixel_array = DicomSlice(dcm_file).memmap_pixel_data()
+        self.assertEqual(pixel_array.dtype, expected.dtype)
+        np.testing.assert_array_equal(pixel_array, expected)
+
+    def test_as_PIL(self):
+        dicom = DicomSlice(TEST_DCM)
+        img = dicom.as_PIL(2)
+        self.assertEqual(img.size, (dicom.shape[1] * 2, dicom.shape[0] * 2))
+        self.assertEqual(img.mode, "RGB")
+
+    def test_as_dicom_slice(self):
+        dicom = DicomSlice(TEST_DCM)
+        self.assertIs(as_dicom_slice(dicom), dicom)
+        self.assertEqual(as_dicom_slice(TEST_DCM).uid, dicom.uid)
+
+
+if __name__ == "__main__":
+    unittest.main()
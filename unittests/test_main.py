@@ -0,0 +1,41 @@
+import unittest
+
+from main import create_parser, parse_limit
+
+
+class TestMain(unittest.TestCase):
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit("-20"), -20.0)
+        self.assertEqual(parse_limit("10.5"), 10.5)
+        self.assertIsNone(parse_limit("none"))
+        self.assertIsNone(parse_limit("None"))
+        with self.assertRaises(ValueError):
+            parse_limit("-20:0")
+
+    def test_parser(self):
+        parser = create_parser()
+        args = parser.parse_args(
+            [
+                "coords.cvi42wsx",
+                "dicom",
+                "--slice-location",
+                "-20",
+                "0",
+                "--trigger-time",
+                "none",
+                "10",
+                "--index-file",
+                "index.sqlite",
+            ]
+        )
+        self.assertEqual(args.slice_location, [-20.0, 0.0])
+        self.assertEqual(args.trigger_time, [None, 10.0])
+        self.assertEqual(args.index_file, "index.sqlite")
+        args = parser.parse_args(["coords.cvi42wsx", "dicom"])
+        self.assertIsNone(args.slice_location)
+        self.assertIsNone(args.trigger_time)
+        self.assertIsNone(args.index_file)
+
+
+if __name__ == "__main__":
+    unittest.main()
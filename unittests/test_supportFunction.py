@@ -1,12 +1,87 @@
+import os
+import shutil
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from shortCardiacBackend.Config import RunConfiguration
 from shortCardiacBackend.supportFunction import *
 
+TEST_DCM = os.path.join(
+    os.path.dirname(__file__), "..", "TestData", "DICOM", "test_slice.dcm"
+)
+TEST_PNG = os.path.join(
+    os.path.dirname(__file__), "..", "TestData", "DICOM", "test_slice.png"
+)
+
 
 class TestsupportFunction(unittest.TestCase):
     def test_flatted_list(self):
         list_with_sublists = [[1, 2], [3]]
         self.assertEqual(flatted_list(list_with_sublists), [1, 2, 3])
 
+    def test_has_dicom_preamble(self):
+        self.assertTrue(has_dicom_preamble(TEST_DCM))
+        self.assertFalse(has_dicom_preamble(TEST_PNG))
+        with tempfile.NamedTemporaryFile(suffix=".dcm") as f:
+            self.assertFalse(has_dicom_preamble(f.name))
+
+    def test_is_file_a_dicom(self):
+        self.assertTrue(is_file_a_dicom(TEST_DCM))
+        self.assertFalse(is_file_a_dicom(TEST_PNG))
+
+    def test_read_dicom_header(self):
+        ds = read_dicom_header(TEST_DCM, specific_tags=["SOPInstanceUID"])
+        self.assertEqual(ds.SOPInstanceUID, pydicom.dcmread(TEST_DCM).SOPInstanceUID)
+        self.assertNotIn("PixelData", ds)
+        self.assertIsNone(read_dicom_header(TEST_PNG))
+
+    def test_walk_files(self):
+        folder = tempfile.mkdtemp()
+        for sub in ["a", os.path.join("a", "b"), "c"]:
+            os.makedirs(os.path.join(folder, sub), exist_ok=True)
+            for name in ["1.dcm", "2.txt"]:
+                open(os.path.join(folder, sub, name), "w").close()
+        walk = [
+            os.path.join(dirpath, filename)
+            for dirpath, _, filenames in os.walk(folder)
+            for filename in filenames
+        ]
+        self.assertEqual(list(walk_files(folder)), walk)
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(list(walk_files(folder, executor=executor)), walk)
+        self.assertEqual(
+            list(walk_files(folder, fast_mode=True)),
+            [file for file in walk if file.endswith(".dcm")],
+        )
+        shutil.rmtree(folder)
+
+    def test_bounded_map(self):
+        expected = [(i, i * i) for i in range(100)]
+        self.assertEqual(list(bounded_map(lambda x: x * x, range(100))), expected)
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(
+                list(bounded_map(lambda x: x * x, range(100), executor, 8)), expected
+            )
+
+    def test_parse_to_arguments(self):
+        config = RunConfiguration()
+        dicom_files = ["a.dcm", "b.dcm", "c.dcm", "d.dcm"]
+        uis = ["1", "2", "3", "2"]
+        coords = {"3": {"roi": 3}, "9": {"roi": 9}, "2": {"roi": 2}}
+        uid_index = build_uid_index(dicom_files, uis)
+        self.assertEqual(uid_index, {"1": "a.dcm", "2": "b.dcm", "3": "c.dcm"})
+        self.assertEqual(report_unmatched_uids(coords, uid_index), (["9"], ["1"]))
+
+        args = iter_arguments(config, coords, uid_index)
+        self.assertFalse(isinstance(args, list))
+        expected = [(config, "c.dcm", {"roi": 3}), (config, "b.dcm", {"roi": 2})]
+        self.assertEqual(list(args), expected)
+        self.assertEqual(parse_to_arguments(config, coords, dicom_files, uis), expected)
+
+        config.DEBUG = True
+        self.assertEqual(match_coordinates(config, coords, uid_index), ["3"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -14,6 +14,21 @@ class Test_transformContours(unittest.TestCase):
         self.assertTrue(any([(np.array([0, 10]) == _).all() for _ in results_]))
         self.assertFalse(any([(np.array([100, 100]) == _).all() for _ in results_]))
 
+    def test_column_extents(self):
+        roi = np.array([(0, 0), (0, 10), (2, 4), (2.5, 6), (5, 1)])
+        columns, present, y_max, y_min, counts = column_extents(roi)
+        np.testing.assert_array_equal(columns, range(6))
+        np.testing.assert_array_equal(present, [1, 0, 1, 0, 0, 1])
+        np.testing.assert_array_equal(counts, [2, 4, 2, 2, 1, 1])
+        np.testing.assert_array_equal(y_max[:3], [10, 10, 6])
+        np.testing.assert_array_equal(y_min[:3], [0, 0, 4])
+
+    def test_calc_line_for_EI(self):
+        roi = np.array([(x, y) for x in range(0, 31) for y in (0, 10 + (x == 15) * 5)])
+        line = calc_line_for_EI(roi, 0)
+        self.assertEqual(len(line), 2)
+        self.assertEqual({tuple(p) for p in line}, {(15, 15), (15, 0)})
+
     def test_calc_center_of_polygon(self):
         points = np.array([(0, 0), (0, 10), (10, 10), (10, 0)])
         self.assertTrue((calc_center_of_polygon(points) == np.array((5, 5))).all())
@@ -31,7 +46,48 @@ class Test_transformContours(unittest.TestCase):
         mask[2:8, 2:8] = 1
         polygon = mask_to_polygon(mask)
         self.assertEqual(polygon.__class__, np.ndarray)
-        # TODO: So far only visually checked, think about how to implement a unittest for this purpose
+        # corners of the square, every edge divided into 4 parts
+        self.assertEqual(polygon.shape, (16, 2))
+        self.assertEqual(
+            {tuple(p) for p in trace_contour(mask)}, {(2, 2), (2, 7), (7, 7), (7, 2)}
+        )
+        self.assertTrue(((polygon >= 2) & (polygon <= 7)).all())
+        self.assertEqual(calc_area(polygon), 25.0)
+
+    def test_resample_polygon(self):
+        polygon = np.array([(0, 0), (0, 10), (10, 10), (10, 0)])
+        np.testing.assert_array_equal(
+            resample_polygon(polygon, subdivisions=2)[:3], [(0, 0), (0, 5), (0, 10)]
+        )
+        resampled = resample_polygon(polygon, spacing=0.5)
+        self.assertEqual(resampled.shape, (80, 2))
+        distances = np.linalg.norm(np.diff(resampled, axis=0), axis=1)
+        self.assertTrue(np.allclose(distances, 0.5))
+
+    def test_close_point_pairs(self):
+        points_1 = np.array([(0, 0), (10, 0), (20, 0)])
+        points_2 = np.array([(0, 3), (10, 1), (50, 50)])
+        index_1, index_2, distances = close_point_pairs(points_1, points_2, 4)
+        np.testing.assert_array_equal(index_1, [0, 1])
+        np.testing.assert_array_equal(index_2, [0, 1])
+        np.testing.assert_array_equal(distances, [3, 1])
+        # strict limit
+        self.assertEqual(len(close_point_pairs(points_1, points_2, 3)[0]), 1)
+
+    def test_farthest_pair(self):
+        rng = np.random.default_rng(0)
+        for points in (
+            rng.integers(0, 5, (30, 2)),
+            rng.normal(0, 10, (40, 2)),
+            np.array([(0, 0), (0, 0)]),
+        ):
+            p, q = farthest_pair(points)
+            p_ref, q_ref = farthest_pair_brute_force(list(points))
+            np.testing.assert_array_equal(p, p_ref)
+            np.testing.assert_array_equal(q, q_ref)
+        p, q = farthest_pair(np.array([(0, 10), (1, 1), (0, 0), (2, 5)]))
+        np.testing.assert_array_equal(p, (0, 0))
+        np.testing.assert_array_equal(q, (0, 10))
 
 
 if __name__ == "__main__":
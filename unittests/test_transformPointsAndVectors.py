@@ -107,6 +107,30 @@ class Test_transformPointsAndVectors(unittest.TestCase):
         p2 = np.array([2, 2])
         self.assertEqual(get_line(p1, p2)[1], (1, 1))
 
+    def test_find_distance_with_angles_and_fixed_point(self):
+        points = [np.array(p) for p in [(10, 0), (0, 10), (-10, 0), (0, -10)]]
+        origin = np.array([0, 0])
+        D = find_distance_with_angles_and_fixed_point(points, [0, 90, -90, 180], origin)
+        self.assertEqual(list(D.keys()), ["0", "90", "-90", "180"])
+        self.assertTrue(all(D["0"][0] == np.array([0, 10])))
+        self.assertTrue(all(D["90"][0] == np.array([-10, 0])))
+        self.assertTrue(all(D["-90"][0] == np.array([-10, 0])))
+        self.assertTrue(all(D["180"][0] == np.array([0, -10])))
+        self.assertTrue(all(D["0"][1] == origin))
+
+    def test_rotate_points(self):
+        points = np.array([(10, 0), (0, 10), (3, 4)])
+        origin = np.array([0, 0])
+        rotated = rotate_points(points, origin, 90)
+        self.assertEqual(rotated.shape, (3, 2))
+        self.assertTrue((rotated == np.array([(0, 10), (-10, 0), (-4, 3)])).all())
+        self.assertTrue(np.issubdtype(rotate_points(points, origin, 45).dtype, np.integer))
+        rotated = rotate_points(points, origin, 45, "float")
+        self.assertEqual(rotated.dtype, np.float64)
+        self.assertAlmostEqual(rotated[0][0], math.sqrt(50))
+        self.assertEqual(rotate_points([np.array([10, 0]), None], origin, 0).shape, (1, 2))
+        self.assertEqual(rotate_points(None, origin, 0).shape, (0, 2))
+
 
 if __name__ == "__main__":
     unittest.main()